@@ -0,0 +1,164 @@
+import argparse
+import asyncio
+import base64
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from io import BytesIO
+
+from loguru import logger
+
+# 直接以插件目录作为包导入，避免执行plugins/__init__.py中的saya加载逻辑
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "plugins"))
+
+ROWS = [1, 100, 1000, 10000]
+LOGO_SIZES = {"logo_100k": 100 * 1024, "logo_5m": 5 * 1024 * 1024}
+HELP_SECTIONS = 40
+
+
+def case_names(rows: list) -> list:
+    names = [f"draw_pic_{x}" for x in rows]
+    names += [f"draw_image_pic_{x}" for x in LOGO_SIZES]
+    names += ["default_help", "mysql_help"]
+    return names
+
+
+def make_logo(size: int) -> str:
+    # 随机像素几乎无法压缩，png体积接近目标字节数
+    from PIL import Image as PIL_Image
+    side = int((size / 3) ** 0.5)
+    io = BytesIO()
+    PIL_Image.frombytes("RGB", (side, side), os.urandom(side * side * 3)).save(io, format="PNG")
+    return base64.b64encode(io.getvalue()).decode()
+
+
+def make_rows(count: int) -> list:
+    # 与订阅列表的行格式保持一致
+    return [f"测试主播{i} {100000 + i} news/live_on/live_off" for i in range(count)]
+
+
+def make_help_context() -> list:
+    # 与_MysqlHelp根据describe_cmd组装的结构一致
+    return [{"section": f"命令{i}",
+             "context": [f"/[命令{i} | cmd{i}] uid", "可选参数：[-t | --text] 使用文字模式发送", f"示例: /命令{i} 2"]}
+            for i in range(HELP_SECTIONS)]
+
+
+async def run_case(name: str, repeat: int) -> dict:
+    from starbot.utils import config
+    # 在事件循环内直接绘制，不经过绘图线程池，并关闭依赖Redis的缓存
+    config.set("MYSQL_PAINTER_WORKERS", 0)
+    config.set("MYSQL_PIC_CACHE_REDIS", False)
+    config.set("MYSQL_LOGO_CACHE_REDIS", False)
+    from graia.ariadne import Ariadne
+    Ariadne.options["StarBotDataSource"] = None
+    from graia.ariadne.model import Friend
+    from starbot_mysql_datasource import mysql_utils
+    from starbot_mysql_datasource.mysql_painter import pic_cache, logo_cache
+
+    if name.startswith("draw_pic_"):
+        rows = make_rows(int(name[len("draw_pic_"):]))
+        func = lambda: mysql_utils.draw_pic(rows, "订阅列表", encoder="list")
+    elif name.startswith("draw_image_pic_"):
+        logo = make_logo(LOGO_SIZES[name[len("draw_image_pic_"):]])
+        func = lambda: mysql_utils.draw_image_pic(logo, "直播报告立绘")
+    elif name == "default_help":
+        friend = Friend(id=1, nickname="benchmark", remark="benchmark")
+        func = lambda: mysql_utils.default_help(friend)
+    elif name == "mysql_help":
+        context = make_help_context()
+        func = lambda: mysql_utils.draw_help_pic(("describe_admin", "帮助"), context, "帮助", "主人命令帮助", 1700)
+    else:
+        raise ValueError(f"未知的测试项 {name}")
+
+    walls = []
+    size = 0
+    for _ in range(repeat):
+        # 每轮清空缓存，测量完整绘制耗时
+        pic_cache.clear()
+        logo_cache.clear()
+        mysql_utils.help_cache.clear()
+        mysql_utils.default_help_cache.clear()
+        start = time.perf_counter()
+        image = await func()
+        walls.append(time.perf_counter() - start)
+        size = len(base64.b64decode(image.base64))
+    return {
+        "case": name,
+        "wall_min": min(walls),
+        "wall_mean": sum(walls) / len(walls),
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "encoded_bytes": size,
+    }
+
+
+def run_in_subprocess(name: str, input_args) -> dict:
+    # 每个测试项单独启动进程，保证峰值内存互不影响
+    cmd = [sys.executable, os.path.abspath(__file__), "--case", name, "--repeat", str(input_args.repeat)]
+    if input_args.encoder:
+        cmd += ["--encoder", input_args.encoder]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=input_args.timeout)
+    except subprocess.TimeoutExpired:
+        return {"case": name, "error": f"超时({input_args.timeout}s)"}
+    if proc.returncode != 0:
+        return {"case": name, "error": proc.stderr.strip().splitlines()[-1:] or [f"退出码 {proc.returncode}"]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(input_args):
+    if input_args.case:
+        if input_args.encoder:
+            from starbot.utils import config
+            config.set("MYSQL_PIC_ENCODER", {"default": input_args.encoder})
+        print(json.dumps(asyncio.new_event_loop().run_until_complete(run_case(input_args.case, input_args.repeat))))
+        return
+    rows = [int(x) for x in input_args.rows.split(",") if x]
+    results = []
+    for name in case_names(rows):
+        logger.info(f"开始测试 {name}")
+        result = run_in_subprocess(name, input_args)
+        if "error" in result:
+            logger.error(f"{name} 失败 {result['error']}")
+        else:
+            logger.info(f"{name} 耗时 {result['wall_min']:.3f}s 峰值内存 {result['peak_rss_kb'] // 1024}MB "
+                        f"图片大小 {result['encoded_bytes'] // 1024}KB")
+        results.append(result)
+    report = {
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": input_args.repeat,
+        "encoder": input_args.encoder or "默认配置",
+        "results": results,
+    }
+    with open(input_args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    logger.success(f"^_^测试结果已写入 {input_args.output}")
+
+
+if __name__ == "__main__":
+    logger_format = (
+        "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | "
+        "<level>{level: <8}</level> | "
+        "<level>{message}</level>"
+    )
+    logger.remove()
+    logger.add(sys.stderr, format=logger_format, level="INFO")
+    # 创建参数解析器
+    parser = argparse.ArgumentParser(description="starbot_mysql_plugin绘图性能测试工具，记录各绘图路径的耗时、峰值内存及图片大小")
+    parser.add_argument("--output", type=str, help="结果输出文件[默认render_benchmark.json]", default="render_benchmark.json")
+    parser.add_argument("--rows", type=str, help="列表绘图的行数，逗号分隔[默认1,100,1000,10000]",
+                        default=",".join(str(x) for x in ROWS))
+    parser.add_argument("--repeat", type=int, help="每项重复次数[默认3]", default=3)
+    parser.add_argument("--encoder", type=str, help="统一使用的编码格式，例如png8、webp:80[默认使用插件配置]", default="")
+    parser.add_argument("--timeout", type=int, help="单项超时时间(秒)[默认600]", default=600)
+    parser.add_argument("--case", type=str, help=argparse.SUPPRESS, default="")
+
+    # 解析参数并运行
+    args = parser.parse_args()
+    main(args)
@@ -109,7 +109,7 @@ async def export_to_sql(db_config, force_flag):
         f.write("SET FOREIGN_KEY_CHECKS=0;\n")
 
         for table in tables:
-            if not force_flag and table not in ["bot", "dynamic_update", "live_off", "live_on", "live_report", "targets"]:
+            if not force_flag and table not in ["blob", "bot", "dynamic_update", "live_off", "live_on", "live_report", "targets", "schema_version"]:
                 logger.debug(f"跳过处理表({table})")
                 continue
             logger.debug(f"正在读取表({table})")
@@ -8,12 +8,21 @@ from loguru import logger
 starbot_sql = """
 SET NAMES utf8mb4;
 SET FOREIGN_KEY_CHECKS = 0;
+DROP TABLE IF EXISTS `blob`;
+CREATE TABLE `blob`  (
+  `hash` char(64) CHARACTER SET utf8mb4 COLLATE utf8mb4_0900_ai_ci NOT NULL COMMENT '图片内容sha256',
+  `data` longtext CHARACTER SET utf8mb4 COLLATE utf8mb4_0900_ai_ci NOT NULL COMMENT '图片base64',
+  `size` int(0) NULL DEFAULT 0,
+  `touched_at` datetime(0) NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`hash`) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_0900_ai_ci ROW_FORMAT = Dynamic;
 DROP TABLE IF EXISTS `bot`;
 CREATE TABLE `bot`  (
   `id` bigint(0) NOT NULL AUTO_INCREMENT,
   `bot` bigint(0) NULL DEFAULT NULL,
   `uid` bigint(0) NULL DEFAULT NULL,
-  PRIMARY KEY (`id`) USING BTREE
+  PRIMARY KEY (`id`) USING BTREE,
+  INDEX `idx_bot_bot_uid`(`bot`, `uid`) USING BTREE
 ) ENGINE = InnoDB AUTO_INCREMENT = 12 CHARACTER SET = utf8mb4 COLLATE = utf8mb4_0900_ai_ci ROW_FORMAT = Dynamic;
 DROP TABLE IF EXISTS `dynamic_update`;
 CREATE TABLE `dynamic_update`  (
@@ -78,7 +87,9 @@ CREATE TABLE `targets`  (
   `type` int(10) UNSIGNED ZEROFILL NULL DEFAULT NULL COMMENT '推送类型，0 为私聊推送，1 为群聊推送',
   `uname` longtext CHARACTER SET utf8mb4 COLLATE utf8mb4_0900_ai_ci NULL,
   `room_id` bigint(0) NULL DEFAULT NULL,
-  PRIMARY KEY (`id`) USING BTREE
+  PRIMARY KEY (`id`) USING BTREE,
+  INDEX `idx_targets_uid_num_type`(`uid`, `num`, `type`) USING BTREE,
+  INDEX `idx_targets_num_type`(`num`, `type`) USING BTREE
 ) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_0900_ai_ci ROW_FORMAT = Dynamic;
 SET FOREIGN_KEY_CHECKS = 1;
 """
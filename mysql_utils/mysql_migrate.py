@@ -0,0 +1,272 @@
+import asyncio
+import aiomysql
+import argparse
+import base64
+import binascii
+import hashlib
+import re
+import sys
+
+from loguru import logger
+
+schema_version_sql = """
+CREATE TABLE IF NOT EXISTS `schema_version`  (
+  `version` int(0) NOT NULL,
+  `description` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_0900_ai_ci NULL DEFAULT NULL,
+  `applied_at` datetime(0) NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`version`) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_0900_ai_ci ROW_FORMAT = Dynamic
+"""
+
+
+def add_index(table: str, index_name: str, columns: str):
+    """
+    生成添加索引的迁移步骤，索引已存在时跳过
+    :param table: 表名
+    :param index_name: 索引名
+    :param columns: 索引列，例如"`uid`, `num`"
+    """
+    async def step(cursor, db: str):
+        await cursor.execute(
+            "SELECT 1 FROM information_schema.statistics "
+            "WHERE `table_schema` = %s AND `table_name` = %s AND `index_name` = %s LIMIT 1",
+            (db, table, index_name)
+        )
+        if await cursor.fetchone():
+            logger.debug(f"索引{table}.{index_name}已存在，跳过")
+            return
+        await cursor.execute(f"ALTER TABLE `{table}` ADD INDEX `{index_name}`({columns}) USING BTREE")
+        logger.debug(f"已添加索引{table}.{index_name}({columns})")
+    return step
+
+
+def create_table(table: str, create_sql: str):
+    """
+    生成创建表的迁移步骤，表已存在时跳过
+    :param table: 表名
+    :param create_sql: 建表语句，需使用CREATE TABLE IF NOT EXISTS
+    """
+    async def step(cursor, db: str):
+        await cursor.execute(create_sql)
+        logger.debug(f"已确认表{table}存在")
+    return step
+
+
+blob_sql = """
+CREATE TABLE IF NOT EXISTS `blob`  (
+  `hash` char(64) CHARACTER SET utf8mb4 COLLATE utf8mb4_0900_ai_ci NOT NULL COMMENT '图片内容sha256',
+  `data` longtext CHARACTER SET utf8mb4 COLLATE utf8mb4_0900_ai_ci NOT NULL COMMENT '图片base64',
+  `size` int(0) NULL DEFAULT 0,
+  `touched_at` datetime(0) NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`hash`) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_0900_ai_ci ROW_FORMAT = Dynamic
+"""
+
+# 与插件mysql_blob.py中的引用格式保持一致
+BLOB_PREFIX = "blob:"
+BASE64PIC_PATTERN = re.compile(r"\{base64pic=([^}]*)\}")
+
+
+async def save_blob(cursor, data: str):
+    """
+    将base64图片写入blob表，返回引用，无法解码的内容原样返回
+    """
+    if not data or data.startswith(BLOB_PREFIX):
+        return data
+    try:
+        digest = hashlib.sha256(base64.b64decode(data)).hexdigest()
+    except (binascii.Error, ValueError):
+        return data
+    await cursor.execute(
+        "INSERT INTO `blob` (`hash`, `data`, `size`) VALUES (%s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE `touched_at` = CURRENT_TIMESTAMP",
+        (digest, data, len(data))
+    )
+    return BLOB_PREFIX + digest
+
+
+async def externalize_logo(cursor, db: str):
+    # 先取出需要转换的id，再逐行读取图片，避免一次性读出全部立绘；先写blob再更新引用，中断后可重复执行
+    await cursor.execute(
+        "SELECT `id` FROM `live_report` WHERE `logo_base64` IS NOT NULL AND `logo_base64` != '' "
+        "AND `logo_base64` NOT LIKE %s", (BLOB_PREFIX + "%",)
+    )
+    ids = [row[0] for row in await cursor.fetchall()]
+    for row_id in ids:
+        await cursor.execute("SELECT `logo_base64` FROM `live_report` WHERE `id` = %s", (row_id,))
+        data = (await cursor.fetchone())[0]
+        ref = await save_blob(cursor, data)
+        if ref != data:
+            await cursor.execute("UPDATE `live_report` SET `logo_base64` = %s WHERE `id` = %s", (ref, row_id))
+    logger.debug(f"已处理{len(ids)}条直播报告立绘")
+
+
+async def externalize_message(cursor, db: str):
+    for table in ("dynamic_update", "live_on", "live_off"):
+        await cursor.execute(f"SELECT `id` FROM `{table}` WHERE `message` LIKE %s", ("%{base64pic=%",))
+        ids = [row[0] for row in await cursor.fetchall()]
+        converted = 0
+        for row_id in ids:
+            await cursor.execute(f"SELECT `message` FROM `{table}` WHERE `id` = %s", (row_id,))
+            message = (await cursor.fetchone())[0]
+            refs = {}
+            for data in set(BASE64PIC_PATTERN.findall(message)):
+                refs[data] = await save_blob(cursor, data)
+            new_message = BASE64PIC_PATTERN.sub(lambda m: "{base64pic=" + refs[m.group(1)] + "}", message)
+            if new_message != message:
+                await cursor.execute(f"UPDATE `{table}` SET `message` = %s WHERE `id` = %s", (new_message, row_id))
+                converted += 1
+        logger.debug(f"已转换{table}表{converted}条推送模板图片")
+
+
+# 迁移步骤按版本号递增追加，已发布的版本不可修改
+MIGRATIONS = [
+    (1, "为targets和bot表添加二级索引", [
+        add_index("targets", "idx_targets_uid_num_type", "`uid`, `num`, `type`"),
+        add_index("targets", "idx_targets_num_type", "`num`, `type`"),
+        add_index("bot", "idx_bot_bot_uid", "`bot`, `uid`"),
+    ]),
+    (2, "创建blob表", [
+        create_table("blob", blob_sql),
+    ]),
+]
+
+
+async def check_db_connection(db_config: dict):
+    """
+    检查数据库连接是否有效
+    :param db_config: 数据库连接配置字典
+    :return: 是否成功
+    """
+    try:
+        # 尝试建立连接
+        conn = await aiomysql.connect(
+            host=db_config["host"],
+            port=db_config["port"],
+            user=db_config["user"],
+            password=db_config["password"],
+            connect_timeout=5  # 设置连接超时时间（秒）
+        )
+
+        conn.close()
+        return True
+
+    except aiomysql.OperationalError as e:
+        error_msg = f"连接失败: {e}"
+        # 常见错误类型细分提示
+        if "Access denied" in str(e):
+            error_msg = "用户名或密码错误，请检查连接配置"
+        elif "Can't connect to MySQL server" in str(e):
+            error_msg = "无法连接到数据库服务器，请检查主机/端口或网络"
+        logger.error(error_msg)
+        return False
+
+    except Exception:
+        logger.exception("未知错误\n")
+        return False
+
+
+async def migrate(db_config: dict, target_version: int):
+    """执行未应用的迁移步骤"""
+    conn = await aiomysql.connect(
+        host=db_config["host"],
+        port=db_config["port"],
+        user=db_config["user"],
+        password=db_config["password"],
+        db=db_config["db"],
+        autocommit=True
+    )
+    try:
+        async with conn.cursor() as cursor:
+            await cursor.execute(schema_version_sql)
+            await cursor.execute("SELECT IFNULL(MAX(`version`), 0) FROM `schema_version`")
+            current_version = (await cursor.fetchone())[0]
+            logger.info(f"当前数据库结构版本 {current_version}")
+            pending = [m for m in MIGRATIONS if current_version < m[0] <= target_version]
+            if len(pending) == 0:
+                logger.info("没有需要执行的迁移")
+                return True
+            for version, description, steps in pending:
+                logger.info(f"开始迁移至版本 {version}: {description}")
+                # DDL语句会隐式提交，每个步骤需自行保证可重复执行
+                for step in steps:
+                    await step(cursor, db_config["db"])
+                await cursor.execute(
+                    "INSERT INTO `schema_version` (`version`, `description`) VALUES (%s, %s)",
+                    (version, description)
+                )
+                logger.success(f"已迁移至版本 {version}")
+        return True
+    except aiomysql.Error as e:
+        logger.error(f"执行迁移失败: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+async def externalize_blob(db_config: dict):
+    """将已有的立绘及推送模板图片转存至blob表，需同时在插件配置中开启MYSQL_BLOB_STORE"""
+    conn = await aiomysql.connect(
+        host=db_config["host"],
+        port=db_config["port"],
+        user=db_config["user"],
+        password=db_config["password"],
+        db=db_config["db"],
+        autocommit=True
+    )
+    try:
+        async with conn.cursor() as cursor:
+            await externalize_logo(cursor, db_config["db"])
+            await externalize_message(cursor, db_config["db"])
+        return True
+    except aiomysql.Error as e:
+        logger.error(f"转存图片失败: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+async def main(input_args):
+    db_config = {
+        "host": f"{input_args.host}",
+        "port": input_args.port,
+        "user": f"{input_args.user}",
+        "password": f"{input_args.password}",
+        "db": f"{input_args.database}"
+    }
+    latest_version = MIGRATIONS[-1][0]
+    target_version = input_args.version if input_args.version > 0 else latest_version
+    db_check_result = await check_db_connection(db_config)
+    if not db_check_result:
+        logger.error(f"数据库连接失败")
+        return
+    logger.info(f"数据库连接成功")
+    if not await migrate(db_config, target_version):
+        return
+    logger.success(f"^_^数据库结构迁移完成，目标版本 {target_version}")
+    if input_args.blob and await externalize_blob(db_config):
+        logger.success(f"^_^图片已转存至blob表")
+
+
+if __name__ == "__main__":
+    logger_format = (
+        "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | "
+        "<level>{level: <8}</level> | "
+        "<level>{message}</level>"
+    )
+    logger.remove()
+    logger.add(sys.stderr, format=logger_format, level="DEBUG")
+    # 创建参数解析器
+    parser = argparse.ArgumentParser(description="starbot_mysql_plugin数据库结构迁移工具，按版本记录并执行表结构变更")
+    parser.add_argument("--host", type=str, help="mysql host[默认127.0.0.1]", default="127.0.0.1")
+    parser.add_argument("--user", type=str, help="mysql username[默认root]", default="root")
+    parser.add_argument("--password", type=str, help="mysql password[默认123456]", default="123456")
+    parser.add_argument("--port", type=int, help="mysql port[默认3306]", default=3306)
+    parser.add_argument("--database", type=str, help="mysql db[默认starbot]", default="starbot")
+    parser.add_argument("--version", type=int, help="迁移到的目标版本[默认最新版本]", default=0)
+    parser.add_argument("--blob", action="store_true", help="将已有的立绘及推送模板图片转存至blob表[默认不转存]")
+
+    # 解析参数并运行
+    args = parser.parse_args()
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(main(args))
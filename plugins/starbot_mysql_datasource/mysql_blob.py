@@ -0,0 +1,167 @@
+import base64
+import binascii
+import hashlib
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from loguru import logger
+from starbot.core.datasource import MySQLDataSource
+from starbot.core.model import PushTarget
+
+from .mysql_cache import LRUCache
+from .mysql_config import get_config
+
+BLOB_TABLE = "blob"
+BLOB_PREFIX = "blob:"
+BASE64PIC_PATTERN = re.compile(r"\{base64pic=([^}]*)\}")
+MESSAGE_TABLES = ("dynamic_update", "live_on", "live_off")
+
+
+def blob_hash(data: str) -> Optional[str]:
+    # 以图片原始数据的sha256作为内容地址，无法解码的内容不转存
+    try:
+        return hashlib.sha256(base64.b64decode(data)).hexdigest()
+    except (binascii.Error, ValueError):
+        return None
+
+
+def is_blob_ref(value) -> bool:
+    return isinstance(value, str) and value.startswith(BLOB_PREFIX)
+
+
+class BlobStore:
+    """
+    按内容哈希存储立绘及推送模板中的base64图片，配置表中只保存"blob:哈希"引用
+    内存中的推送目标始终为图片内容，相同图片共享缓存中的同一字符串
+    仅在开启MYSQL_BLOB_STORE且blob表存在时转存，已有的引用无论是否开启均会解析
+    """
+    __available: Optional[bool] = None
+    __cache: Optional[LRUCache] = None
+
+    def __init__(self):
+        self.__available = None
+        self.__cache = LRUCache(get_config("MYSQL_BLOB_CACHE_SIZE"), 0, get_config("MYSQL_BLOB_CACHE_MAX_BYTES"), len)
+
+    async def check(self, datasource: MySQLDataSource) -> bool:
+        if self.__available is None:
+            rows = await datasource._MySQLDataSource__query(
+                "SELECT 1 FROM information_schema.tables WHERE `table_schema` = DATABASE() AND `table_name` = %s "
+                "LIMIT 1;", (BLOB_TABLE,))
+            self.__available = len(rows) > 0
+            if not self.__available and get_config("MYSQL_BLOB_STORE"):
+                logger.warning("未找到blob表，图片将内联存储，执行mysql_migrate.py后重启即可启用")
+        return self.__available
+
+    @staticmethod
+    def insert_query(digest: str, data: str) -> Tuple[str, tuple]:
+        sql = (f"INSERT INTO `{BLOB_TABLE}` (`hash`, `data`, `size`) VALUES (%s, %s, %s) "
+               f"ON DUPLICATE KEY UPDATE `touched_at` = CURRENT_TIMESTAMP")
+        return sql, (digest, data, len(data))
+
+    def __to_ref(self, data: str, blobs: Dict[str, str]) -> str:
+        if not data or is_blob_ref(data):
+            return data
+        digest = blob_hash(data)
+        if digest is None:
+            return data
+        blobs[digest] = data
+        self.__cache.set(digest, data)
+        return BLOB_PREFIX + digest
+
+    def externalize(self, obj) -> List[Tuple[str, tuple]]:
+        # 将待写入的立绘及推送模板中的base64图片替换为引用，返回写入blob表的语句，需与配置表语句在同一事务内执行
+        blobs: Dict[str, str] = {}
+        obj.report.logo_base64 = self.__to_ref(obj.report.logo_base64, blobs)
+        for message_obj in (obj.dynamic, obj.live_on, obj.live_off):
+            if message_obj.message:
+                message_obj.message = BASE64PIC_PATTERN.sub(
+                    lambda m: "{base64pic=" + self.__to_ref(m.group(1), blobs) + "}", message_obj.message)
+        return [self.insert_query(digest, data) for digest, data in blobs.items()]
+
+    @staticmethod
+    def __messages(target: PushTarget) -> list:
+        return [target.live_on, target.live_off, target.dynamic_update]
+
+    async def resolve_targets(self, datasource: MySQLDataSource, targets: Iterable[PushTarget]):
+        # 将内存中推送目标的引用替换为图片内容，缓存未命中的图片一次查询取回
+        targets = list(targets)
+        digests: Set[str] = set()
+        for target in targets:
+            if is_blob_ref(target.live_report.logo_base64):
+                digests.add(target.live_report.logo_base64[len(BLOB_PREFIX):])
+            for message_obj in self.__messages(target):
+                if message_obj.message and BLOB_PREFIX in message_obj.message:
+                    digests.update(x[len(BLOB_PREFIX):] for x in BASE64PIC_PATTERN.findall(message_obj.message)
+                                   if is_blob_ref(x))
+        if len(digests) == 0:
+            return
+        resolved: Dict[str, str] = {}
+        for digest in digests:
+            data = self.__cache.get(digest)
+            if data is not None:
+                resolved[digest] = data
+        missing = [x for x in digests if x not in resolved]
+        for index in range(0, len(missing), 500):
+            chunk = missing[index:index + 500]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            rows = await datasource._MySQLDataSource__query(
+                f"SELECT `hash`, `data` FROM `{BLOB_TABLE}` WHERE `hash` IN ({placeholders});", chunk)
+            for row in rows:
+                resolved[row["hash"]] = row["data"]
+                self.__cache.set(row["hash"], row["data"])
+        for digest in digests:
+            if digest not in resolved:
+                logger.warning(f"blob表中不存在图片 {digest}，已忽略该图片")
+
+        def resolve(value: str) -> str:
+            return resolved.get(value[len(BLOB_PREFIX):], "") if is_blob_ref(value) else value
+
+        def resolve_placeholder(match) -> str:
+            # 图片缺失时移除整个占位符
+            data = resolve(match.group(1))
+            return "{base64pic=" + data + "}" if data else ""
+
+        # 相同模板解析结果共享同一字符串
+        messages: Dict[str, str] = {}
+        for target in targets:
+            target.live_report.logo_base64 = resolve(target.live_report.logo_base64)
+            for message_obj in self.__messages(target):
+                message = message_obj.message
+                if not message or BLOB_PREFIX not in message:
+                    continue
+                if message not in messages:
+                    messages[message] = BASE64PIC_PATTERN.sub(resolve_placeholder, message)
+                message_obj.message = messages[message]
+
+    async def resolve_datasource(self, datasource: MySQLDataSource):
+        if not await self.check(datasource):
+            return
+        await self.resolve_targets(datasource, [t for up in datasource.get_up_list() for t in up.targets])
+
+    async def gc(self, datasource: MySQLDataSource) -> int:
+        # 删除不再被引用的图片，最近写入或复用的图片可能正被未提交的订阅引用，保留一段时间后再清理
+        if not await self.check(datasource):
+            return 0
+        query = datasource._MySQLDataSource__query
+        referenced: Set[str] = set()
+        rows = await query("SELECT `logo_base64` FROM `live_report` WHERE `logo_base64` LIKE %s;", (BLOB_PREFIX + "%",))
+        referenced.update(row["logo_base64"][len(BLOB_PREFIX):] for row in rows)
+        for table in MESSAGE_TABLES:
+            rows = await query(f"SELECT `message` FROM `{table}` WHERE `message` LIKE %s;",
+                               ("%{base64pic=" + BLOB_PREFIX + "%",))
+            for row in rows:
+                referenced.update(x[len(BLOB_PREFIX):] for x in BASE64PIC_PATTERN.findall(row["message"])
+                                  if is_blob_ref(x))
+        rows = await query(f"SELECT `hash` FROM `{BLOB_TABLE}` WHERE `touched_at` < NOW() - INTERVAL %s SECOND;",
+                           (get_config("MYSQL_BLOB_GC_GRACE"),))
+        orphans = [row["hash"] for row in rows if row["hash"] not in referenced]
+        for index in range(0, len(orphans), 500):
+            chunk = orphans[index:index + 500]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            await query(f"DELETE FROM `{BLOB_TABLE}` WHERE `hash` IN ({placeholders});", chunk)
+            for digest in chunk:
+                self.__cache.delete(digest)
+        return len(orphans)
+
+
+blob_store = BlobStore()
@@ -0,0 +1,76 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class LRUCache:
+    """
+    带有效期的进程内LRU缓存
+    过期条目不会立即删除，可通过allow_expired读取，用于上游不可用时的降级
+    传入weigher和max_weight时额外按条目总权重(例如字节数)淘汰
+    """
+    __data: OrderedDict = None
+    max_size: int = 1024
+    ttl: float = 0
+    max_weight: int = 0
+    weigher: Optional[Callable[[Any], int]] = None
+    weight: int = 0
+    hits: int = 0
+    misses: int = 0
+
+    def __init__(self, max_size: int = 1024, ttl: float = 0, max_weight: int = 0,
+                 weigher: Optional[Callable[[Any], int]] = None):
+        self.__data = OrderedDict()
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_weight = max_weight
+        self.weigher = weigher
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, allow_expired: bool = False) -> Optional[Any]:
+        item = self.__data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        value, expire_at, _ = item
+        if not allow_expired and expire_at and expire_at < time.monotonic():
+            self.misses += 1
+            return None
+        self.__data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        expire_at = time.monotonic() + self.ttl if self.ttl > 0 else 0
+        item_weight = self.weigher(value) if self.weigher is not None else 0
+        if self.max_weight > 0 and item_weight > self.max_weight:
+            # 单个条目超过总权重上限时不缓存
+            self.delete(key)
+            return
+        self.delete(key)
+        self.__data[key] = (value, expire_at, item_weight)
+        self.weight += item_weight
+        while len(self.__data) > self.max_size or (self.max_weight > 0 and self.weight > self.max_weight):
+            _, (_, _, evict_weight) = self.__data.popitem(last=False)
+            self.weight -= evict_weight
+
+    def delete(self, key: Hashable):
+        item = self.__data.pop(key, None)
+        if item is not None:
+            self.weight -= item[2]
+
+    def clear(self):
+        self.__data.clear()
+        self.weight = 0
+
+    def stats(self) -> str:
+        return f"条目 {len(self.__data)} 命中 {self.hits} 未命中 {self.misses}"
+
+    def __len__(self):
+        return len(self.__data)
+
+    def __contains__(self, key: Hashable):
+        item = self.__data.get(key)
+        return item is not None and not (item[1] and item[1] < time.monotonic())
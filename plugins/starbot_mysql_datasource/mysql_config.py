@@ -0,0 +1,87 @@
+from typing import Any
+
+from starbot.utils import config
+
+# 插件自有配置项，可通过config.set覆盖，例如config.set("MYSQL_UNAME_CACHE_TTL", 600)
+PLUGIN_DEFAULT_CONFIG = {
+    # UP主昵称及房间号进程内缓存条目上限
+    "MYSQL_UNAME_CACHE_SIZE": 4096,
+    # UP主昵称及房间号进程内缓存有效期(秒)
+    "MYSQL_UNAME_CACHE_TTL": 600,
+    # UP主昵称及房间号Redis缓存有效期(秒)
+    "MYSQL_UNAME_REDIS_TTL": 86400,
+    # 查询UP主昵称及房间号的请求超时时间(秒)，超时后使用过期缓存
+    "MYSQL_UNAME_REQUEST_TIMEOUT": 5,
+    # 数据源转储时并发查询UP主昵称的数量
+    "MYSQL_TRANS_CONCURRENCY": 8,
+    # 数据源转储时每个事务写入的推送目标数量
+    "MYSQL_TRANS_BATCH_SIZE": 200,
+    # 绘图线程数量，为0时在事件循环内绘图
+    "MYSQL_PAINTER_WORKERS": 2,
+    # 绘图任务最大排队数量
+    "MYSQL_PAINTER_QUEUE_SIZE": 16,
+    # 查询订阅时每页图片包含的行数上限，推送目标标题计为一行
+    "MYSQL_UP_LIST_PAGE_ROWS": 200,
+    # 回复图片缓存条目上限
+    "MYSQL_PIC_CACHE_SIZE": 256,
+    # 回复图片缓存总字节数上限
+    "MYSQL_PIC_CACHE_MAX_BYTES": 64 * 1024 * 1024,
+    # 回复图片编码格式，按使用场景分别配置，可选png、png8(256色调色板)、jpeg、webp，jpeg和webp可用"webp:80"形式指定质量
+    # 默认均为无损png，png8、jpeg、webp体积更小但有画质损失，需要时自行开启
+    "MYSQL_PIC_ENCODER": {"default": "png", "help": "png", "list": "png", "logo": "png"},
+    # 未指定质量时jpeg、webp的默认编码质量
+    "MYSQL_PIC_QUALITY": 85,
+    # 回复图片的大小目标(字节)，超过时jpeg、webp逐步降低质量，png改用调色板编码，0为不限制
+    "MYSQL_PIC_MAX_BYTES": 0,
+    # 按大小目标降低质量时的最低质量
+    "MYSQL_PIC_MIN_QUALITY": 50,
+    # 是否额外编码一次png用于统计节省的字节数
+    "MYSQL_PIC_ENCODE_STATS": False,
+    # 获取消息图片的大小上限(字节)
+    "MYSQL_IMAGE_MAX_BYTES": 10 * 1024 * 1024,
+    # 获取消息图片的超时时间(秒)
+    "MYSQL_IMAGE_DOWNLOAD_TIMEOUT": 30,
+    # 是否在保存立绘及推送图片前去除元数据、限制尺寸并重新编码
+    "MYSQL_IMAGE_NORMALIZE": True,
+    # 按使用场景限制保存图片的尺寸(像素)，message限制最长边，logo裁剪透明边缘后限制宽度，不小于直播报告中的绘制宽度300
+    "MYSQL_IMAGE_MAX_SIDE": {"logo": 600, "message": 1280},
+    # jpeg、webp图片重新编码时的质量，其他格式无损保存为png
+    "MYSQL_IMAGE_QUALITY": 85,
+    # 获取消息图片的连接池大小
+    "MYSQL_MEDIA_POOL_LIMIT": 8,
+    # 获取消息图片的空闲连接保持时间(秒)
+    "MYSQL_MEDIA_KEEPALIVE": 60,
+    # 是否将立绘及推送模板中的图片转存至blob表，配置表中只保存引用，需先执行mysql_migrate.py创建blob表
+    # 数据源启动时读取的是引用，插件载入并替换为图片内容之前发出的推送中图片无法显示，因此默认关闭
+    "MYSQL_BLOB_STORE": False,
+    # blob表图片内容缓存条目上限
+    "MYSQL_BLOB_CACHE_SIZE": 256,
+    # blob表图片内容缓存总字节数上限
+    "MYSQL_BLOB_CACHE_MAX_BYTES": 128 * 1024 * 1024,
+    # 清理blob表时保留最近写入或复用的图片的时间(秒)
+    "MYSQL_BLOB_GC_GRACE": 3600,
+    # 是否复用已上传至协议端的图片，相同图片再次发送时只发送图片id
+    "MYSQL_UPLOAD_REUSE": True,
+    # 已上传图片id缓存条目上限
+    "MYSQL_UPLOAD_CACHE_SIZE": 256,
+    # 已上传图片id有效期(秒)，超过后重新上传
+    "MYSQL_UPLOAD_CACHE_TTL": 6 * 3600,
+    # 立绘缩略图缓存条目上限
+    "MYSQL_LOGO_CACHE_SIZE": 128,
+    # 是否同时将立绘缩略图缓存写入Redis
+    "MYSQL_LOGO_CACHE_REDIS": True,
+    # 立绘缩略图Redis缓存有效期(秒)
+    "MYSQL_LOGO_REDIS_TTL": 7 * 86400,
+    # 是否同时将回复图片缓存写入Redis
+    "MYSQL_PIC_CACHE_REDIS": False,
+    # 回复图片Redis缓存有效期(秒)
+    "MYSQL_PIC_CACHE_REDIS_TTL": 3600,
+}
+
+
+def get_config(key: str) -> Any:
+    # StarBot默认配置中不包含插件配置项，未设置时直接读取config.get会抛出KeyError
+    try:
+        return config.get(key)
+    except KeyError:
+        return PLUGIN_DEFAULT_CONFIG[key]
@@ -0,0 +1,93 @@
+from typing import Dict, List, Optional, Set, Tuple
+
+from starbot.core.datasource import DataSource
+from starbot.core.model import PushType
+from starbot.core.room import Up
+
+
+class UpIndex:
+    """
+    数据源中UP实例的内存索引
+    数据源每次format_data都会生成新的UP列表，通过比对列表对象判断索引是否需要重建
+    """
+    __source: Optional[List[Up]] = None
+    __up_map: Dict[int, Up] = {}
+    # (推送类型, 群号/QQ号) -> {uid: None}，使用dict保持UP在数据源中的顺序
+    __target_map: Dict[Tuple[PushType, int], Dict[int, None]] = {}
+    __up_targets: Dict[int, Set[Tuple[PushType, int]]] = {}
+    __group_set: Set[int] = set()
+    __friend_set: Set[int] = set()
+
+    def __init__(self):
+        self.__source = None
+        self.__up_map = {}
+        self.__target_map = {}
+        self.__up_targets = {}
+        self.__group_set = set()
+        self.__friend_set = set()
+
+    def sync(self, datasource: DataSource):
+        ups: List[Up] = datasource.get_up_list()
+        if ups is self.__source:
+            return
+        # 构建索引时统一将uid转换为int，避免查询时逐个转换字符串比较
+        self.__up_map = {int(up.uid): up for up in ups}
+        self.__target_map = {}
+        self.__up_targets = {}
+        self.__group_set = set()
+        self.__friend_set = set()
+        for up in ups:
+            self.__add_targets(up)
+        self.__source = ups
+
+    def __add_targets(self, up: Up):
+        uid = int(up.uid)
+        keys = {(PushType(target.type), int(target.id)) for target in up.targets}
+        self.__up_targets[uid] = keys
+        for key in keys:
+            self.__target_map.setdefault(key, {})[uid] = None
+            if key[0] == PushType.Group:
+                self.__group_set.add(key[1])
+            else:
+                self.__friend_set.add(key[1])
+
+    def __remove_targets(self, uid: int):
+        for key in self.__up_targets.pop(uid, set()):
+            uids = self.__target_map.get(key)
+            if uids is None:
+                continue
+            uids.pop(uid, None)
+            if len(uids) == 0:
+                del self.__target_map[key]
+                if key[0] == PushType.Group:
+                    self.__group_set.discard(key[1])
+                else:
+                    self.__friend_set.discard(key[1])
+
+    def update_up(self, datasource: DataSource, up: Up):
+        # 直接修改Up.targets后调用，仅更新该UP在反向索引中的推送目标
+        self.sync(datasource)
+        uid = int(up.uid)
+        if self.__up_map.get(uid) is not up:
+            return
+        self.__remove_targets(uid)
+        self.__add_targets(up)
+
+    def get_up(self, datasource: DataSource, uid) -> Optional[Up]:
+        self.sync(datasource)
+        try:
+            return self.__up_map.get(int(uid))
+        except (TypeError, ValueError):
+            return None
+
+    def get_ups_by_target(self, datasource: DataSource, num: int, push_type: PushType) -> List[Up]:
+        self.sync(datasource)
+        uids = self.__target_map.get((PushType(push_type), int(num)), {})
+        return [self.__up_map[uid] for uid in uids]
+
+    def get_groups_and_friends(self, datasource: DataSource) -> Tuple[Set[int], Set[int]]:
+        self.sync(datasource)
+        return set(self.__group_set), set(self.__friend_set)
+
+
+up_index = UpIndex()
@@ -0,0 +1,87 @@
+import ssl
+import time
+from typing import Optional
+
+import aiohttp
+from starbot.utils.network import get_session
+
+from .mysql_config import get_config
+
+
+def create_ssl_context() -> ssl.SSLContext:
+    # 针对multimedia.nt.qq.com.cn的ssl握手失败进行密码套件兼容
+    # 修改方案来自于https://github.com/LagrangeDev/Lagrange.Core/issues/315
+    ssl_context = ssl.create_default_context()
+    ssl_context.set_ciphers('DEFAULT')
+    ssl_context.options |= ssl.OP_NO_SSLv2
+    ssl_context.options |= ssl.OP_NO_SSLv3
+    ssl_context.options |= ssl.OP_NO_TLSv1
+    ssl_context.options |= ssl.OP_NO_TLSv1_1
+    ssl_context.options |= ssl.OP_NO_COMPRESSION
+    return ssl_context
+
+
+class MediaClient:
+    """
+    获取QQ消息图片使用的HTTP客户端，共享SSL上下文并保持连接复用
+    通过aiohttp的trace统计新建连接及复用连接次数，用于估算节省的握手耗时
+    """
+    __ssl_context: Optional[ssl.SSLContext] = None
+    __session: Optional[aiohttp.ClientSession] = None
+    requests: int = 0
+    created: int = 0
+    reused: int = 0
+    connect_time: float = 0
+
+    def __init__(self):
+        self.__ssl_context = None
+        self.__session = None
+        self.requests = 0
+        self.created = 0
+        self.reused = 0
+        self.connect_time = 0
+
+    def __trace_config(self) -> aiohttp.TraceConfig:
+        async def on_request_start(session, ctx, params):
+            self.requests += 1
+
+        async def on_connection_create_start(session, ctx, params):
+            ctx.connect_start = time.monotonic()
+
+        async def on_connection_create_end(session, ctx, params):
+            self.created += 1
+            self.connect_time += time.monotonic() - ctx.connect_start
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self.reused += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    def session(self) -> aiohttp.ClientSession:
+        if self.__session is None or self.__session.closed:
+            if self.__ssl_context is None:
+                self.__ssl_context = create_ssl_context()
+            connector = aiohttp.TCPConnector(ssl=self.__ssl_context, limit=get_config("MYSQL_MEDIA_POOL_LIMIT"),
+                                             keepalive_timeout=get_config("MYSQL_MEDIA_KEEPALIVE"))
+            # 沿用StarBot请求使用的请求头(User-Agent等)
+            self.__session = aiohttp.ClientSession(connector=connector, headers=get_session().headers,
+                                                   trace_configs=[self.__trace_config()])
+        return self.__session
+
+    async def close(self):
+        if self.__session is not None:
+            await self.__session.close()
+            self.__session = None
+
+    def stats(self) -> str:
+        connect_avg = self.connect_time / self.created * 1000 if self.created else 0
+        return (f"请求 {self.requests} 新建连接 {self.created}(平均 {connect_avg:.0f}ms) 复用连接 {self.reused} "
+                f"约节省 {connect_avg * self.reused / 1000:.1f}s")
+
+
+media_client = MediaClient()
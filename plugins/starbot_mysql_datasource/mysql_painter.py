@@ -0,0 +1,424 @@
+import asyncio
+import base64
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple, Union
+
+from PIL import Image as PIL_Image, ImageOps
+from starbot.painter.PicGenerator import PicGenerator, Color
+from starbot.utils import config, redis
+
+from loguru import logger
+
+from .mysql_cache import LRUCache
+from .mysql_config import get_config
+
+# 内容边距及底部圆角区域高度
+PIC_MARGIN = 50
+PIC_BOTTOM = 35
+
+
+def color_value(colors):
+    # 颜色统一转换为元组，保证绘图描述可以序列化并参与缓存哈希
+    if colors is None:
+        return None
+    if isinstance(colors, Color):
+        return colors.value
+    if isinstance(colors, list):
+        return [c.value if isinstance(c, Color) else c for c in colors]
+    return colors
+
+
+class PicSpec:
+    """
+    可序列化的绘图描述，方法名与PicGenerator保持一致，记录绘图操作后交由render_spec执行
+    """
+    width: int = 1000
+    top_blank: int = 0
+    encoder: str = "default"
+    ops: List[tuple] = []
+
+    def __init__(self, width: int = 1000, top_blank: int = 0, encoder: str = "default"):
+        self.width = width
+        self.top_blank = top_blank
+        self.encoder = encoder
+        self.ops = []
+
+    def draw_chapter(self, chapter: str, color: Union[Color, Tuple[int, int, int]] = Color.BLACK):
+        self.ops.append(("chapter", chapter, color_value(color)))
+        return self
+
+    def draw_section(self, section: str, color: Union[Color, Tuple[int, int, int]] = Color.BLACK):
+        self.ops.append(("section", section, color_value(color)))
+        return self
+
+    def draw_tip(self, tip: str, color: Union[Color, Tuple[int, int, int]] = Color.GRAY):
+        self.ops.append(("tip", tip, color_value(color)))
+        return self
+
+    def draw_text(self, texts: Union[str, List[str]], colors=None):
+        self.ops.append(("text", texts, color_value(colors)))
+        return self
+
+    def draw_text_multiline(self, margin: int, texts: Union[str, List[str]], colors=None):
+        self.ops.append(("text_multiline", margin, texts, color_value(colors)))
+        return self
+
+    def draw_text_right(self, margin_right: int, texts: Union[str, List[str]], colors=None):
+        self.ops.append(("text_right", margin_right, texts, color_value(colors)))
+        return self
+
+    def draw_logo(self, image_base64: str, logo_width: int = 300):
+        self.ops.append(("logo", image_base64, logo_width))
+        return self
+
+    def spec(self) -> dict:
+        return {"width": self.width, "top_blank": self.top_blank, "encoder": encoder_config(self.encoder),
+                "ops": self.ops}
+
+
+def encoder_config(encoder: str) -> Tuple[str, int]:
+    # 按使用场景读取编码配置，未配置的场景使用default
+    encoders = get_config("MYSQL_PIC_ENCODER")
+    value = encoders.get(encoder, encoders.get("default", "png"))
+    fmt, _, quality = value.partition(":")
+    return fmt.lower(), int(quality) if quality else get_config("MYSQL_PIC_QUALITY")
+
+
+def encode_image(img: PIL_Image.Image, fmt: str, quality: int) -> bytes:
+    io = BytesIO()
+    if fmt == "png8":
+        # 文字为主的图片颜色较少，转换为调色板后体积明显减小
+        img.quantize(256, method=PIL_Image.Quantize.FASTOCTREE).save(io, format="PNG", optimize=True)
+    elif fmt == "jpeg":
+        # jpeg不支持透明，圆角外的透明区域以白色填充
+        background = PIL_Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        background.save(io, format="JPEG", quality=quality, optimize=True)
+    elif fmt == "webp":
+        img.save(io, format="WEBP", quality=quality)
+    else:
+        img.save(io, format="PNG")
+    return io.getvalue()
+
+
+def encode_image_limited(img: PIL_Image.Image, fmt: str, quality: int, max_bytes: int) -> bytes:
+    # 超过大小目标时，有损格式逐步降低质量直至最低质量，png改用调色板编码
+    data = encode_image(img, fmt, quality)
+    if max_bytes <= 0 or len(data) <= max_bytes:
+        return data
+    if fmt in ("jpeg", "webp"):
+        min_quality = get_config("MYSQL_PIC_MIN_QUALITY")
+        while len(data) > max_bytes and quality > min_quality:
+            quality = max(min_quality, quality - 10)
+            data = encode_image(img, fmt, quality)
+    elif fmt == "png":
+        data = encode_image(img, "png8", 0)
+    return data
+
+
+def normalize_image(data: bytes, max_side: int, quality: int, logo: bool = False) -> bytes:
+    # 按exif方向旋转后去除元数据并限制尺寸，重新编码时保持原图格式，含透明像素或jpeg、webp以外的图片保存为png
+    # 立绘与直播报告的绘制方式一致，先裁剪透明边缘再只限制宽度，避免竖长立绘被缩得过窄
+    img = PIL_Image.open(BytesIO(data))
+    if getattr(img, "n_frames", 1) > 1:
+        # 动图保持原样
+        return data
+    fmt = img.format
+    has_exif = "exif" in img.info
+    rotated = img.getexif().get(0x0112, 1) != 1
+    if not logo and not rotated and max(img.size) <= max_side and not has_exif:
+        # 仅读取文件头判断是否需要旋转或缩放，无需处理且不含exif时不解码图片
+        return data
+    img = ImageOps.exif_transpose(img)
+    if logo:
+        img = img.convert("RGBA")
+        bbox = img.getbbox()
+        cropped = bbox is not None and bbox != (0, 0) + img.size
+        if cropped:
+            img = img.crop(bbox)
+        changed = rotated or cropped or img.width > max_side
+        if img.width > max_side:
+            img = img.resize((max_side, max(1, round(img.height * max_side / img.width))),
+                             PIL_Image.Resampling.LANCZOS)
+    else:
+        changed = rotated or max(img.size) > max_side
+        if max(img.size) > max_side:
+            img.thumbnail((max_side, max_side), PIL_Image.Resampling.LANCZOS)
+    if not changed and not has_exif:
+        return data
+    io = BytesIO()
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        img = img.convert("RGBA")
+    if img.mode == "RGBA" and img.getchannel("A").getextrema()[0] < 255:
+        img.save(io, format="PNG", optimize=True)
+    elif fmt == "JPEG":
+        img.convert("RGB").save(io, format="JPEG", quality=quality, optimize=True)
+    elif fmt == "WEBP":
+        img.convert("RGB").save(io, format="WEBP", quality=quality)
+    else:
+        if img.mode not in ("1", "L", "P", "RGB"):
+            img = img.convert("RGB")
+        img.save(io, format="PNG", optimize=True)
+    result = io.getvalue()
+    # 仅去除元数据时，重新编码未变小则保留原图
+    if not changed and len(result) >= len(data):
+        return data
+    return result
+
+
+def load_logo(image_base64: str, logo_width: int) -> PIL_Image.Image:
+    logo = PIL_Image.open(BytesIO(base64.b64decode(image_base64)))
+    logo = logo.convert("RGBA")
+    logo = logo.crop(logo.getbbox())
+    if logo.width == logo_width:
+        # 已是缩略图时无需再次缩放
+        return logo
+    logo_height = int(logo.height * (logo_width / logo.width))
+    return logo.resize((logo_width, logo_height))
+
+
+def make_thumbnail(image_base64: str, logo_width: int) -> str:
+    # 裁剪透明边缘并缩放至指定宽度，返回png图片的base64字符串
+    io = BytesIO()
+    load_logo(image_base64, logo_width).save(io, format="PNG")
+    return base64.b64encode(io.getvalue()).decode()
+
+
+def execute_ops(pic: PicGenerator, ops: List[tuple], logos: Dict[int, PIL_Image.Image]):
+    for index, op in enumerate(ops):
+        name = op[0]
+        if name == "chapter":
+            pic.draw_chapter(op[1], op[2])
+        elif name == "section":
+            pic.draw_section(op[1], op[2])
+        elif name == "tip":
+            pic.draw_tip(op[1], op[2])
+        elif name == "text":
+            pic.draw_text(op[1], op[2])
+        elif name == "text_multiline":
+            pic.draw_text_multiline(op[1], op[2], op[3])
+        elif name == "text_right":
+            pic.draw_text_right(op[1], op[2], op[3])
+        elif name == "logo":
+            pic.draw_img_alpha(logos[index])
+
+
+def measure_ops(pic: PicGenerator, spec: dict, logos: Dict[int, PIL_Image.Image]) -> int:
+    # 按PicGenerator的排版规则计算绘图结束时的纵坐标，不实际绘制
+    width = spec["width"]
+    row_space = pic.row_space
+    chapter_height = pic._PicGenerator__chapter_font.size + row_space
+    section_height = pic._PicGenerator__section_font.size + row_space
+    tip_height = pic._PicGenerator__tip_font.size + row_space
+    text_height = pic._PicGenerator__text_font.size + row_space
+    cover_margin = config.get("PAINTER_AUTO_SIZE_BY_LIMIT_MARGIN")
+    char_length: Dict[str, int] = {}
+    x0 = PIC_MARGIN
+    y = spec["top_blank"] + PIC_MARGIN
+    for index, op in enumerate(spec["ops"]):
+        name = op[0]
+        if name == "chapter":
+            y += chapter_height
+        elif name == "section":
+            y += section_height
+        elif name == "tip":
+            y += tip_height
+        elif name == "text":
+            y += text_height
+        elif name == "text_multiline":
+            margin = op[1]
+            texts = [op[2]] if isinstance(op[2], str) else op[2]
+            x = x0
+            for text in texts:
+                for c in text:
+                    length = char_length.get(c)
+                    if length is None:
+                        length = pic.get_text_length(c)
+                        char_length[c] = length
+                    if x + length > width - margin:
+                        x = x0
+                        y += text_height
+                    x += length
+            y += text_height
+        elif name == "text_right":
+            y = max(y, cover_margin) + text_height
+        elif name == "logo":
+            y += logos[index].height + row_space
+    return y
+
+
+def render_spec(spec: dict) -> Tuple[str, int, int]:
+    # 在绘图线程中执行，先计算内容高度再按实际高度创建画布，返回编码后图片的base64字符串、字节数及png编码的字节数
+    width = spec["width"]
+    top_blank = spec["top_blank"]
+    ops = spec["ops"]
+    logos = {index: load_logo(op[1], op[2]) for index, op in enumerate(ops) if op[0] == "logo"}
+    height = measure_ops(PicGenerator(width, 1), spec, logos) + PIC_BOTTOM
+    pic = PicGenerator(width, height)
+    pic.set_pos(PIC_MARGIN, top_blank + PIC_MARGIN).draw_rounded_rectangle(0, top_blank, width, height - top_blank,
+                                                                           35, Color.WHITE)
+    execute_ops(pic, ops, logos)
+    img = pic.img
+    fmt, quality = spec.get("encoder", ("png", 0))
+    data = encode_image_limited(img, fmt, quality, get_config("MYSQL_PIC_MAX_BYTES"))
+    png_size = len(data)
+    if fmt != "png" and get_config("MYSQL_PIC_ENCODE_STATS"):
+        png_size = len(encode_image(img, "png", 0))
+    img.close()
+    return base64.b64encode(data).decode(), len(data), png_size
+
+
+class EncodeStats:
+    """
+    回复图片编码统计
+    """
+    count: int = 0
+    size: int = 0
+    saved: int = 0
+
+    def add(self, size: int, png_size: int):
+        self.count += 1
+        self.size += size
+        self.saved += png_size - size
+
+    def stats(self) -> str:
+        result = f"共 {self.count} 张 {self.size // 1024}KB"
+        # 未开启统计时没有png编码的大小可供比较
+        if get_config("MYSQL_PIC_ENCODE_STATS"):
+            result += f" 节省 {self.saved // 1024}KB"
+        return result
+
+
+encode_stats = EncodeStats()
+
+
+class PicRenderer:
+    """
+    绘图线程池，排队数量受限，线程数为0时在事件循环内绘制
+    StarBot载入插件时直播间连接、数据库连接池等已经打开，fork子进程会继承这些连接；
+    spawn及forkserver方式会在子进程中重新执行启动脚本及插件包的saya导入，因此使用线程池
+    PIL的编码及大部分绘制操作会释放GIL，绘制大图时事件循环仍可继续处理其他消息
+    """
+    __executor: Optional[ThreadPoolExecutor] = None
+    __semaphore: Optional[asyncio.Semaphore] = None
+    __disabled: bool = False
+
+    def __init__(self):
+        self.__executor = None
+        self.__semaphore = None
+        self.__disabled = False
+
+    def __get_executor(self) -> Optional[ThreadPoolExecutor]:
+        if self.__disabled:
+            return None
+        if self.__executor is None:
+            workers = get_config("MYSQL_PAINTER_WORKERS")
+            if workers <= 0:
+                self.__disabled = True
+                return None
+            self.__executor = ThreadPoolExecutor(workers, thread_name_prefix="mysql_painter")
+        return self.__executor
+
+    async def render(self, spec: dict) -> str:
+        result, size, png_size = await self.__render(spec)
+        encode_stats.add(size, png_size)
+        return result
+
+    async def __render(self, spec: dict) -> Tuple[str, int, int]:
+        executor = self.__get_executor()
+        if executor is None:
+            return render_spec(spec)
+        if self.__semaphore is None:
+            self.__semaphore = asyncio.Semaphore(get_config("MYSQL_PAINTER_QUEUE_SIZE"))
+        async with self.__semaphore:
+            try:
+                return await asyncio.get_running_loop().run_in_executor(executor, render_spec, spec)
+            except RuntimeError as e:
+                # 线程池已关闭(bot正在退出)时在事件循环内绘制
+                logger.warning(f"绘图线程池不可用，改为在事件循环内绘制 {e}")
+                return render_spec(spec)
+
+    def shutdown(self):
+        self.__disabled = True
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False)
+            self.__executor = None
+
+
+pic_renderer = PicRenderer()
+
+
+# 以绘图描述内容(包含版本号)的哈希作为键缓存回复图片
+pic_cache = LRUCache(get_config("MYSQL_PIC_CACHE_SIZE"), 0, get_config("MYSQL_PIC_CACHE_MAX_BYTES"), len)
+
+
+def spec_hash(spec: dict) -> str:
+    return hashlib.sha256(json.dumps(spec, ensure_ascii=False, sort_keys=True).encode()).hexdigest()
+
+
+# 正在绘制的图片，相同绘图描述的并发请求共享同一次绘制
+pic_pending: Dict[str, asyncio.Future] = {}
+
+
+async def render_cached(spec: dict) -> str:
+    key = spec_hash(spec)
+    cached = pic_cache.get(key)
+    if cached is not None:
+        return cached
+    task = pic_pending.get(key)
+    if task is None:
+        task = asyncio.ensure_future(render_uncached(key, spec))
+        pic_pending[key] = task
+
+        def done(t: asyncio.Future):
+            pic_pending.pop(key, None)
+            # 等待方均已取消时也需取出异常，避免未获取异常的警告
+            if not t.cancelled():
+                t.exception()
+
+        task.add_done_callback(done)
+    # 单个等待方取消时不影响其他等待方共享的绘制
+    return await asyncio.shield(task)
+
+
+async def render_uncached(key: str, spec: dict) -> str:
+    redis_flag = get_config("MYSQL_PIC_CACHE_REDIS")
+    redis_key = f"StarBotMysqlPic:{key}"
+    if redis_flag:
+        cached = await redis.get(redis_key)
+        if cached:
+            pic_cache.set(key, cached)
+            return cached
+    result = await pic_renderer.render(spec)
+    pic_cache.set(key, result)
+    if redis_flag:
+        await redis.set_(redis_key, result)
+        await redis.expire(redis_key, get_config("MYSQL_PIC_CACHE_REDIS_TTL"))
+    return result
+
+
+# 立绘缩略图缓存，键为原图内容哈希及缩略图宽度
+logo_cache = LRUCache(get_config("MYSQL_LOGO_CACHE_SIZE"))
+
+
+async def get_logo_thumbnail(image_base64: str, logo_width: int = 300) -> str:
+    key = f"{hashlib.sha256(image_base64.encode()).hexdigest()}:{logo_width}"
+    cached = logo_cache.get(key)
+    if cached is not None:
+        return cached
+    redis_flag = get_config("MYSQL_LOGO_CACHE_REDIS")
+    redis_key = f"StarBotMysqlLogo:{key}"
+    if redis_flag:
+        cached = await redis.get(redis_key)
+        if cached:
+            logo_cache.set(key, cached)
+            return cached
+    result = await asyncio.get_running_loop().run_in_executor(None, make_thumbnail, image_base64, logo_width)
+    logo_cache.set(key, result)
+    if redis_flag:
+        await redis.set_(redis_key, result)
+        await redis.expire(redis_key, get_config("MYSQL_LOGO_REDIS_TTL"))
+    return result
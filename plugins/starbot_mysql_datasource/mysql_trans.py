@@ -1,12 +1,18 @@
+import asyncio
+import gzip
 import os
+import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import Awaitable, Callable, List, Optional
 from pydantic import BaseModel
 from graia.ariadne import Ariadne
 from starbot.core.datasource import MySQLDataSource
+from starbot.core.model import PushType
 from starbot.utils import config
 
-from .mysql_utils import ObjMysql
+from .mysql_blob import blob_store
+from .mysql_config import get_config
+from .mysql_utils import ObjMysql, BotMysql, TargetMysql, select_uname_and_room_id
 
 
 class LiveOn(BaseModel):
@@ -163,7 +169,7 @@ class Bot(BaseModel):
 mysql_datasource: Optional[MySQLDataSource] = None
 
 
-async def datasource_trans_to_mysql():
+async def datasource_trans_to_mysql(progress: Optional[Callable[[int, int], Awaitable]] = None):
     datasource = Ariadne.options["StarBotDataSource"]
     if isinstance(datasource, MySQLDataSource):
         return False, "已经是MYSQL数据源，无需转储"
@@ -177,29 +183,116 @@ async def datasource_trans_to_mysql():
     global mysql_datasource
     if mysql_datasource is None:
         mysql_datasource = MySQLDataSource(username, password, host, port, db)
+    obj_mysql = ObjMysql(mysql_datasource)
+    await obj_mysql.connect()
+
+    # 一次性读取已存在的bot和推送目标，避免逐个推送目标查询
+    bot_rows = await obj_mysql.query(f"SELECT `bot`, `uid` FROM `{BotMysql.mysql_name}`")
+    exist_bots = {(int(row["bot"]), int(row["uid"])) for row in bot_rows}
+    target_rows = await obj_mysql.query(f"SELECT `id`, `uid`, `num`, `type` FROM `{TargetMysql.mysql_name}`")
+    exist_targets = {(int(row["uid"]), int(row["num"]), int(row["type"])): row["id"] for row in target_rows}
+
+    # 昵称和房间号按uid去重后并发查询，内存中已有的直接使用
+    unames = {}
+    pending_ups = {}
     for bot in bots:
         for up in bot.ups:
+            if up.uname and up.room_id:
+                unames[up.uid] = (up.uname, up.room_id)
+            elif up.uid not in unames:
+                pending_ups[up.uid] = up
+    semaphore = asyncio.Semaphore(get_config("MYSQL_TRANS_CONCURRENCY"))
+
+    async def select_uname(uid):
+        async with semaphore:
+            unames[uid] = await select_uname_and_room_id(uid)
+
+    await asyncio.gather(*[select_uname(uid) for uid in pending_ups if uid not in unames])
+
+    blob_enabled = await blob_store.check(mysql_datasource)
+    statements = []
+    for bot in bots:
+        for up in bot.ups:
+            up_statements = []
+            if (bot.qq, up.uid) not in exist_bots:
+                up_statements.append(BotMysql(bot.qq, up.uid).mysql_insert_query())
+                exist_bots.add((bot.qq, up.uid))
             for target in up.targets:
-                obj_mysql = ObjMysql(mysql_datasource)
                 target_dict: dict = target.dict()
-                await obj_mysql.trans_targets(bot.qq, up.uid, target.id, target_dict)
-                await obj_mysql.trans_save()
+                target_obj = ObjMysql(mysql_datasource)
+                target_id = exist_targets.get((up.uid, target.id, PushType(target.type).value))
+                if target_id is None:
+                    target_id = uuid.uuid1()  # 使用uuid1确保表主键不重复
+                    target_obj.target_create_flag = True
+                target_obj.fill_trans_targets(up.uid, target.id, target_dict, target_id)
+                target_obj.target.uname, target_obj.target.room_id = unames[up.uid]
+                if blob_enabled:
+                    up_statements.extend(blob_store.externalize(target_obj))
+                up_statements.extend(target_obj.trans_statements())
+            statements.append((len(up.targets), up_statements))
+
+    # 按推送目标数量分批，每批在一个事务内通过多行INSERT写入
+    total = sum(count for count, _ in statements)
+    batch_size = get_config("MYSQL_TRANS_BATCH_SIZE")
+    done = 0
+    last_report = 0
+    batch = []
+    batch_count = 0
+    for index, (count, up_statements) in enumerate(statements):
+        batch.extend(up_statements)
+        batch_count += count
+        if batch_count < batch_size and index < len(statements) - 1:
+            continue
+        if len(batch) > 0:
+            await obj_mysql.query_batch(batch)
+        done += batch_count
+        batch = []
+        batch_count = 0
+        # 进度最多汇报10次
+        if progress is not None and total > 0 and (done - last_report) * 10 >= total and done < total:
+            last_report = done
+            await progress(done, total)
     return True, ""
 
 
-def datasource_trans_to_json():
+def write_json_file(json_file: str, bots: list, gzip_flag: bool):
+    # 在工作线程中逐个UP序列化写入临时文件，完成后原子替换为目标文件
+    tmp_file = f"{json_file}.tmp"
+    try:
+        with (gzip.open(tmp_file, "wt", encoding="utf-8") if gzip_flag
+              else open(tmp_file, "w", encoding="utf-8")) as f:
+            f.write("[")
+            for bot_index, (bot, ups) in enumerate(bots):
+                if bot_index > 0:
+                    f.write(",")
+                bot_json = bot.json(exclude={"ups"}, ensure_ascii=False)
+                f.write(bot_json[:-1])
+                f.write(', "ups": [' if bot_json != "{}" else '"ups": [')
+                for up_index, up in enumerate(ups):
+                    if up_index > 0:
+                        f.write(", ")
+                    f.write(up.json(ensure_ascii=False))
+                f.write("]}")
+            f.write("]")
+        os.replace(tmp_file, json_file)
+    except Exception:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+
+async def datasource_trans_to_json(gzip_flag: bool = False):
     datasource = Ariadne.options["StarBotDataSource"]
 
     json_file = f"推送配置_{datetime.now().strftime('%Y%m%d%H%M%S')}.json"
+    if gzip_flag:
+        json_file = f"{json_file}.gz"
+    # 在事件循环中取UP列表快照，避免写入过程中订阅变更影响遍历
+    bots = [(bot, list(bot.ups)) for bot in datasource.bots]
 
     try:
-        with open(json_file, "w", encoding="utf-8") as f:
-            bot_list_json = []
-            for bot in datasource.bots:
-                bot_list_json.append(bot.json(ensure_ascii=False))
-            f.write("[" + ",".join(bot_list_json) + "]")
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, write_json_file, json_file, bots, gzip_flag)
     except Exception as ex:
-        if os.path.exists(json_file):
-            os.remove(json_file)
         return False, f"发生错误： {ex}"
     return True, json_file
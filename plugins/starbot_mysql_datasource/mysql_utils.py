@@ -1,27 +1,36 @@
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 import asyncio
 import uuid
-from PIL import Image as PIL_Image
-from io import BytesIO
 import base64
-import ssl
+import hashlib
+import json
+import aiohttp
+import pymysql
 
 from graia.ariadne import Ariadne
 from graia.ariadne.message.chain import MessageChain
 from graia.ariadne.message.element import Image, At, AtAll, Quote
+from graia.ariadne.connection.util import UploadMethod
 from graia.ariadne.model import Friend, Group, Member
 from starbot.core.datasource import MySQLDataSource
 from starbot.core.user import User, RelationType
 from starbot.core.room import Up
-from starbot.core.model import PushType
+from starbot.core.model import PushType, PushTarget, LiveOn, LiveOff, LiveReport, DynamicUpdate
 from starbot.utils import config, redis
-from starbot.utils.network import request, get_session
+from starbot.utils.network import request
 from starbot.utils.utils import get_credential
 from starbot.exception import ResponseCodeException, DataSourceException, LiveException
-from starbot.painter.PicGenerator import PicGenerator, Color
+from starbot.painter.PicGenerator import Color
 
 from loguru import logger
 
+from .mysql_blob import blob_store
+from .mysql_cache import LRUCache
+from .mysql_config import get_config
+from .mysql_index import up_index
+from .mysql_media import media_client
+from .mysql_painter import PicSpec, pic_renderer, render_cached, get_logo_thumbnail, normalize_image
+
 _version = "v1.2.1"
 
 master_qq = config.get("MASTER_QQ")
@@ -70,7 +79,10 @@ def get_logger_prefix(cmd: object, sender: object, member: Optional[Member] = No
     return f"未知身份 命令({cmd})"
 
 
-async def select_uname_and_room_id(uid):
+uname_cache = LRUCache(get_config("MYSQL_UNAME_CACHE_SIZE"), get_config("MYSQL_UNAME_CACHE_TTL"))
+
+
+async def request_uname_and_room_id(uid):
     user_info_url = f"https://api.live.bilibili.com/live_user/v1/Master/info?uid={uid}"
     user_info = await request("GET", user_info_url)
     uname = user_info["info"]["uname"]
@@ -86,6 +98,35 @@ async def select_uname_and_room_id(uid):
     return uname, room_id
 
 
+async def select_uname_and_room_id(uid, refresh: bool = False):
+    # 查询顺序：进程内缓存 -> Redis缓存 -> B站接口，refresh为True时跳过缓存强制刷新昵称
+    uid = int(uid)
+    redis_key = f"StarBotMysqlUname:{uid}"
+    if not refresh:
+        cached = uname_cache.get(uid)
+        if cached is not None:
+            return cached
+        cached = await redis.get(redis_key)
+        if cached:
+            cached = json.loads(cached)
+            result = (cached["uname"], cached["room_id"])
+            uname_cache.set(uid, result)
+            return result
+    try:
+        result = await asyncio.wait_for(request_uname_and_room_id(uid),
+                                        get_config("MYSQL_UNAME_REQUEST_TIMEOUT"))
+    except Exception as e:
+        stale = uname_cache.get(uid, allow_expired=True)
+        if stale is None:
+            raise
+        logger.warning(f"查询UP主(UID:{uid})昵称失败，使用缓存的昵称{stale[0]} {e}")
+        return stale
+    uname_cache.set(uid, result)
+    await redis.set_(redis_key, json.dumps({"uname": result[0], "room_id": result[1]}, ensure_ascii=False))
+    await redis.expire(redis_key, get_config("MYSQL_UNAME_REDIS_TTL"))
+    return result
+
+
 def get_message_help(message_type: str):
     msg = ""
     if message_type == "news":
@@ -158,12 +199,30 @@ def create_auto_follow_task():
     follow_task.add_done_callback(lambda t: core_tasks.remove(t))
 
 
-def draw_pic(messages: Union[str, List], title: Optional[str] = None, sub_title: Optional[str] = None, width=1000,
-             height=100000):
+def create_blob_resolve_task():
+    core_tasks = set()
+    database = Ariadne.options["StarBotDataSource"]
+
+    async def blob_resolve_task():
+        # 数据源启动时读取的立绘及推送模板为blob引用，插件载入后替换为图片内容，失败时重试直至成功
+        while True:
+            try:
+                await blob_store.resolve_datasource(database)
+                return
+            except Exception as e:
+                logger.exception(f"载入blob图片异常，30秒后重试", e)
+            await asyncio.sleep(30)
+
+    resolve_task = asyncio.create_task(blob_resolve_task())
+    core_tasks.add(resolve_task)
+    resolve_task.add_done_callback(lambda t: core_tasks.remove(t))
+
+
+async def draw_pic(messages: Union[str, List], title: Optional[str] = None, sub_title: Optional[str] = None,
+                   width=1000, encoder: str = "default"):
     if messages is None or len(messages) == 0:
         return None
-    pic = PicGenerator(width, height)
-    pic.set_pos(50, 50).draw_rounded_rectangle(0, 0, width, height, 35, Color.WHITE).copy_bottom(35)
+    pic = PicSpec(width, encoder=encoder)
     if title is not None and len(title) > 0:
         pic.draw_chapter(title)
         if sub_title is not None and len(title) > 0:
@@ -182,54 +241,114 @@ def draw_pic(messages: Union[str, List], title: Optional[str] = None, sub_title:
     pic.draw_text_right(25, "Designed By StarBot", Color.GRAY)
     pic.draw_text_right(25, "https://github.com/Starlwr/StarBot", Color.LINK)
     pic.draw_text_right(25, f"{__package__}.{_version}", Color.GREEN)
-    pic.crop_and_paste_bottom()
-    return Image(base64=pic.base64())
+    return Image(base64=await render_cached(pic.spec()))
+
+
+# 帮助图片缓存，键为(帮助类型, 标题)，值为(内容指纹, 图片base64)
+help_cache: Dict[tuple, Tuple[str, str]] = {}
+
+
+def help_fingerprint(*content) -> str:
+    return hashlib.sha256(json.dumps(content, ensure_ascii=False, sort_keys=True).encode()).hexdigest()
+
+
+async def draw_help_pic(key: tuple, messages: List, title: Optional[str] = None, sub_title: Optional[str] = None,
+                        width=1000):
+    # 帮助内容(describe_cmd、append_report_help等)变化后指纹随之变化，缓存自动失效
+    fingerprint = help_fingerprint(messages, title, sub_title, width)
+    cached = help_cache.get(key)
+    if cached is not None and cached[0] == fingerprint:
+        return Image(base64=cached[1])
+    image = await draw_pic(messages, title, sub_title, width, "help")
+    if image is not None:
+        help_cache[key] = (fingerprint, image.base64)
+    return image
+
+
+# 已上传图片缓存，键为(图片内容哈希, 上传类型)，值为协议端返回的图片id
+upload_cache = LRUCache(get_config("MYSQL_UPLOAD_CACHE_SIZE"), get_config("MYSQL_UPLOAD_CACHE_TTL"))
 
 
-def draw_image_pic(image_base64, title: Optional[str] = None, width=800, height=100000):
+async def send_image(app: Ariadne, sender: Union[Friend, Group], image: Optional[Image]):
+    """
+    发送图片，同一账号下相同图片在有效期内只上传一次，之后通过图片id发送
+    图片id失效导致发送失败时重新上传，上传失败时直接发送base64
+    """
+    if image is None or image.base64 is None or not get_config("MYSQL_UPLOAD_REUSE"):
+        return await app.send_message(sender, MessageChain(image))
+    method = UploadMethod.Group if isinstance(sender, Group) else UploadMethod.Friend
+    # 图片id只对上传的账号有效，多账号时按账号分别缓存
+    key = (app.account, hashlib.sha256(image.base64.encode()).hexdigest(), str(method))
+    image_id = upload_cache.get(key)
+    if image_id is not None:
+        try:
+            return await app.send_message(sender, MessageChain(Image(id=image_id)))
+        except Exception as e:
+            logger.warning(f"通过图片id发送失败，重新上传 {e}")
+            upload_cache.delete(key)
+    try:
+        uploaded = await app.upload_image(base64.b64decode(image.base64), method)
+    except Exception as e:
+        logger.warning(f"上传图片失败，直接发送图片 {e}")
+        return await app.send_message(sender, MessageChain(image))
+    if not uploaded.id:
+        return await app.send_message(sender, MessageChain(image))
+    upload_cache.set(key, uploaded.id)
+    return await app.send_message(sender, MessageChain(Image(id=uploaded.id)))
+
+
+async def draw_image_pic(image_base64, title: Optional[str] = None, width=800):
     if image_base64 is None or len(image_base64) == 0:
         return None
     top_blank = 75
-    margin = 50
-    pic = PicGenerator(width, height)
-    pic.set_pos(margin, top_blank + margin).draw_rounded_rectangle(0, top_blank, width, height - top_blank, 35,
-                                                                   Color.WHITE).copy_bottom(35)
+    pic = PicSpec(width, top_blank, "logo")
     if title is not None and len(title) > 0:
         pic.draw_chapter(title)
         pic.draw_text("")
 
-    logo_bytes = BytesIO(base64.b64decode(image_base64))
-    logo = PIL_Image.open(logo_bytes)
-
-    logo = logo.convert("RGBA")
-    logo = logo.crop(logo.getbbox())
-
-    logo_width = 300
-    logo_height = int(logo.height * (logo_width / logo.width))
-    logo = logo.resize((logo_width, logo_height))
-
-    pic.draw_img_alpha(logo)
+    pic.draw_logo(await get_logo_thumbnail(image_base64, 300), 300)
 
     # 底部版权信息，请务必保留此处
     pic.draw_text("")
     pic.draw_text_right(50, "Designed By StarBot", Color.GRAY)
     pic.draw_text_right(50, "https://github.com/Starlwr/StarBot", Color.LINK)
     pic.draw_text_right(25, f"{__package__}.{_version}", Color.GREEN)
-    pic.crop_and_paste_bottom()
-    return Image(base64=pic.base64())
+    return Image(base64=await pic_renderer.render(pic.spec()))
 
 
 # 默认帮助，取自starbot.commands.builtin.help，可以根据需要自行修改
+disable_querys = ["DenyRoomData", "DenyRoomDataTotal", "DenyBind", "DenyUserData", "DenyUserDataTotal"]
+
+# 默认帮助仅随禁用状态掩码(共32种)和命令前缀变化，按需绘制后缓存
+default_help_cache: Dict[Tuple[int, str], str] = {}
+
+
+async def exists_disable_commands(names: List[str], _id: int) -> List[bool]:
+    # 与redis.exists_disable_command相同的键，StarBot未公开redis客户端，能取到时通过pipeline一次往返查询全部命令
+    client = getattr(redis, "__redis", None)
+    if client is None or not hasattr(client, "pipeline"):
+        return list(await asyncio.gather(*[redis.exists_disable_command(name, _id) for name in names]))
+    pipe = client.pipeline(transaction=False)
+    for name in names:
+        pipe.sismember(name, _id)
+    return [bool(x) for x in await pipe.execute()]
+
+
 async def default_help(sender: Union[Friend, Group]):
-    disable_querys = ["DenyRoomData", "DenyRoomDataTotal", "DenyBind", "DenyUserData", "DenyUserDataTotal"]
-    disabled = [False] * 5
+    mask = 0
     if isinstance(sender, Group):
-        disabled = [await redis.exists_disable_command(x, sender.id) for x in disable_querys]
+        disabled = await exists_disable_commands(disable_querys, sender.id)
+        mask = sum(1 << i for i, x in enumerate(disabled) if x)
+    key = (mask, prefix)
+    result = default_help_cache.get(key)
+    if result is None:
+        result = await pic_renderer.render(default_help_spec([bool(mask & (1 << i)) for i in range(5)]))
+        default_help_cache[key] = result
+    return Image(base64=result)
+
 
-    width = 1000
-    height = 100000
-    pic = PicGenerator(width, height)
-    pic.set_pos(50, 50).draw_rounded_rectangle(0, 0, width, height, 35, Color.WHITE).copy_bottom(35)
+def default_help_spec(disabled: List[bool]) -> dict:
+    pic = PicSpec(1000, encoder="help")
 
     pic.draw_chapter("StarBot 帮助")
     pic.draw_text("")
@@ -344,8 +463,7 @@ async def default_help(sender: Union[Friend, Group]):
     pic.draw_text_right(25, "Designed By StarBot", Color.GRAY)
     pic.draw_text_right(25, "https://github.com/Starlwr/StarBot", Color.LINK)
     pic.draw_text_right(25, f"{__package__}.{_version}", Color.GREEN)
-    pic.crop_and_paste_bottom()
-    return Image(base64=pic.base64())
+    return pic.spec()
 
 # bot状态，0：公开，1：私人
 
@@ -379,26 +497,61 @@ async def check_bot_mode_public(qq_num: int) -> bool:
     return True
 
 
-async def element_get_bytes(image: Image):
+async def element_get_bytes(image: Image) -> bytes:
+    """
+    获取图片元素的原始数据，下载时分块读取并限制大小和超时
+    获取失败或超过大小限制时抛出ValueError，base64编码由调用方在需要时进行
+    """
+    max_bytes = get_config("MYSQL_IMAGE_MAX_BYTES")
+    too_large = f"图片大小超过限制({max_bytes // 1024}KB)"
     if image.base64:
-        return base64.b64decode(image.base64)
+        image_data = base64.b64decode(image.base64)
+        if len(image_data) > max_bytes:
+            raise ValueError(too_large)
+        return image_data
     if not image.url:
         raise ValueError("you should offer a url.")
-    # 针对multimedia.nt.qq.com.cn的ssl握手失败进行密码套件兼容
-    # 修改方案来自于https://github.com/LagrangeDev/Lagrange.Core/issues/315
-    ssl_context = ssl.create_default_context()
-    ssl_context.set_ciphers('DEFAULT')
-    ssl_context.options |= ssl.OP_NO_SSLv2
-    ssl_context.options |= ssl.OP_NO_SSLv3
-    ssl_context.options |= ssl.OP_NO_TLSv1
-    ssl_context.options |= ssl.OP_NO_TLSv1_1
-    ssl_context.options |= ssl.OP_NO_COMPRESSION
-    response = await get_session().get(image.url, ssl=ssl_context)
-    response.raise_for_status()
-    image_data = await response.read()
-    image_base64 = base64.b64encode(image_data).decode("ascii")
-    image.base64 = image_base64
-    return image_base64
+    timeout = aiohttp.ClientTimeout(total=get_config("MYSQL_IMAGE_DOWNLOAD_TIMEOUT"))
+    chunks = []
+    size = 0
+    try:
+        async with media_client.session().get(image.url, timeout=timeout) as response:
+            response.raise_for_status()
+            if response.content_length is not None and response.content_length > max_bytes:
+                raise ValueError(too_large)
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ValueError(too_large)
+                chunks.append(chunk)
+    except asyncio.TimeoutError:
+        raise ValueError("获取图片超时")
+    except aiohttp.ClientError as e:
+        raise ValueError(f"获取图片失败 {e}")
+    return b"".join(chunks)
+
+
+async def normalize_image_bytes(image_data: bytes, usage: str = "message") -> bytes:
+    """
+    保存前规范化用户发送的图片，在线程池中执行，无法识别的图片保持原样
+    :param image_data: 图片原始数据
+    :param usage: 使用场景，logo或message，对应MYSQL_IMAGE_MAX_SIDE中的尺寸限制
+    """
+    if not get_config("MYSQL_IMAGE_NORMALIZE"):
+        return image_data
+    max_side = get_config("MYSQL_IMAGE_MAX_SIDE").get(usage, 1280)
+    logo = usage == "logo"
+    if logo:
+        # 立绘宽度不小于直播报告中的绘制宽度
+        max_side = max(max_side, 300)
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(
+            None, normalize_image, image_data, max_side, get_config("MYSQL_IMAGE_QUALITY"), logo)
+    except Exception as e:
+        logger.warning(f"图片规范化失败，使用原图保存 {e}")
+        return image_data
+    logger.info(f"图片规范化 {len(image_data) // 1024}KB -> {len(result) // 1024}KB")
+    return result
 
 
 def append_report_help(help_str):
@@ -431,12 +584,60 @@ def append_report_help(help_str):
     return help_str
 
 
+def split_chunks(items: list, size: int) -> List[list]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def split_list_pages(items: list, page_rows: int) -> List[list]:
+    # 按行数分页，推送目标标题计为一行，单个推送目标下的UP过多时拆分到多页，续页重复标题
+    pages = []
+    page = []
+    rows = 0
+    for item in items:
+        if not isinstance(item, dict):
+            if rows >= page_rows:
+                pages.append(page)
+                page, rows = [], 0
+            page.append(item)
+            rows += 1
+            continue
+        context = list(item.get("context"))
+        start = 0
+        while True:
+            if page and page_rows - rows < 2:
+                pages.append(page)
+                page, rows = [], 0
+            chunk = context[start:start + max(1, page_rows - rows - 1)]
+            section = item.get("section") if start == 0 else f"{item.get('section')}(续)"
+            page.append({"section": section, "context": chunk})
+            rows += len(chunk) + 1
+            start += len(chunk)
+            if start >= len(context):
+                break
+    if page:
+        pages.append(page)
+    return pages
+
+
+async def unfollow_up(uid: int, uname: str, room_id: int):
+    try:
+        unfollow_user = User(uid, get_credential())
+        await unfollow_user.modify_relation(RelationType.UNSUBSCRIBE)
+        logger.success(f"自动取消关注成功 {uname} (UID: {uid} 房间号: {room_id})")
+    except ResponseCodeException as e:
+        if e.code == 22115 or e.code == 22007:
+            logger.warning(f"读取登录账号的关注列表失败, 请检查登录凭据是否已失效, 错误信息: {e.msg}")
+    except Exception as e:
+        logger.exception(f"取消关注异常 {uid = }\n", e)
+
+
 class BotMysql:
     id: int = 0
     bot: int = 0
     uid: int = 0
 
     mysql_name = "bot"
+    mysql_columns = ("id", "bot", "uid")
 
     def __init__(self, bot: int, uid: int):
         self.bot = bot
@@ -451,14 +652,11 @@ class BotMysql:
     def set_id(self, target_id: int):
         self.id = target_id
 
-    def mysql_insert_query(self) -> str:
-        return f"INSERT INTO `{self.mysql_name}` (`bot`, `uid`) VALUES ({self.bot}, {self.uid})"
-
-    def mysql_delete_query(self) -> str:
-        return f"DELETE FROM `{self.mysql_name}` WHERE `id` = '{self.id}'"
+    def mysql_insert_query(self) -> Tuple[str, tuple]:
+        return f"INSERT INTO `{self.mysql_name}` (`bot`, `uid`) VALUES (%s, %s)", (self.bot, self.uid)
 
-    def mysql_get_by_bot_and_uid_query(self) -> str:
-        return f"SELECT * FROM `{self.mysql_name}` WHERE `bot` = {self.bot} and `uid` = {self.uid}"
+    def mysql_delete_query(self) -> Tuple[str, tuple]:
+        return f"DELETE FROM `{self.mysql_name}` WHERE `id` = %s", (self.id,)
 
 
 class DynamicMysql:
@@ -470,6 +668,7 @@ class DynamicMysql:
     _message_default: str = "{uname} {action}\n{url}\n{picture}"
 
     mysql_name = "dynamic_update"
+    mysql_columns = ("id", "uid", "enabled", "message")
 
     def __init__(self, uid: int):
         self.uid = uid
@@ -508,19 +707,16 @@ class DynamicMysql:
         else:
             self.message = self._message_default
 
-    def mysql_insert_query(self) -> str:
-        return f"INSERT INTO `{self.mysql_name}` (`id`, `uid`, `enabled`, `message`) VALUES ('{self.id}', {self.uid}, {int(self.enabled)}, '{self.message}')"
+    def mysql_insert_query(self) -> Tuple[str, tuple]:
+        sql = f"INSERT INTO `{self.mysql_name}` (`id`, `uid`, `enabled`, `message`) VALUES (%s, %s, %s, %s)"
+        return sql, (f"{self.id}", self.uid, int(self.enabled), self.message)
 
-    def mysql_delete_query(self) -> str:
-        return f"DELETE FROM `{self.mysql_name}` WHERE `id` = '{self.id}'"
+    def mysql_delete_query(self) -> Tuple[str, tuple]:
+        return f"DELETE FROM `{self.mysql_name}` WHERE `id` = %s", (f"{self.id}",)
 
-    def mysql_update_query(self) -> str:
-        return f"UPDATE `{self.mysql_name}` SET `uid` = {self.uid}, `enabled` = {int(self.enabled)}, `message` = '{self.message}' WHERE `id` = '{self.id}'"
-
-    def mysql_get_by_id_query(self, target_id="") -> str:
-        if target_id == "":
-            target_id = self.id
-        return f"SELECT * FROM `{self.mysql_name}` WHERE `id` = '{target_id}'"
+    def mysql_update_query(self) -> Tuple[str, tuple]:
+        sql = f"UPDATE `{self.mysql_name}` SET `uid` = %s, `enabled` = %s, `message` = %s WHERE `id` = %s"
+        return sql, (self.uid, int(self.enabled), self.message, f"{self.id}")
 
 
 class LiveOffMysql:
@@ -531,6 +727,7 @@ class LiveOffMysql:
     _message_default: str = "{uname} 直播结束了"
 
     mysql_name = "live_off"
+    mysql_columns = ("id", "uid", "enabled", "message")
 
     def __init__(self, uid: int):
         self.uid = uid
@@ -563,19 +760,16 @@ class LiveOffMysql:
         else:
             self.message = self._message_default
 
-    def mysql_insert_query(self) -> str:
-        return f"INSERT INTO `{self.mysql_name}` (`id`, `uid`, `enabled`, `message`) VALUES ('{self.id}', {self.uid}, {int(self.enabled)}, '{self.message}')"
-
-    def mysql_delete_query(self) -> str:
-        return f"DELETE FROM `{self.mysql_name}` WHERE `id` = '{self.id}'"
+    def mysql_insert_query(self) -> Tuple[str, tuple]:
+        sql = f"INSERT INTO `{self.mysql_name}` (`id`, `uid`, `enabled`, `message`) VALUES (%s, %s, %s, %s)"
+        return sql, (f"{self.id}", self.uid, int(self.enabled), self.message)
 
-    def mysql_update_query(self) -> str:
-        return f"UPDATE `{self.mysql_name}` SET `uid` = {self.uid}, `enabled` = {int(self.enabled)}, `message` = '{self.message}' WHERE `id` = '{self.id}'"
+    def mysql_delete_query(self) -> Tuple[str, tuple]:
+        return f"DELETE FROM `{self.mysql_name}` WHERE `id` = %s", (f"{self.id}",)
 
-    def mysql_get_by_id_query(self, target_id="") -> str:
-        if target_id == "":
-            target_id = self.id
-        return f"SELECT * FROM `{self.mysql_name}` WHERE `id` = '{target_id}'"
+    def mysql_update_query(self) -> Tuple[str, tuple]:
+        sql = f"UPDATE `{self.mysql_name}` SET `uid` = %s, `enabled` = %s, `message` = %s WHERE `id` = %s"
+        return sql, (self.uid, int(self.enabled), self.message, f"{self.id}")
 
 
 class LiveOnMysql:
@@ -587,6 +781,7 @@ class LiveOnMysql:
     _message_default: str = "{uname} 正在直播 {title}\n{url}\n{cover}"
 
     mysql_name = "live_on"
+    mysql_columns = ("id", "uid", "enabled", "message")
 
     def __init__(self, uid: int):
         self.uid = uid
@@ -625,19 +820,16 @@ class LiveOnMysql:
         else:
             self.message = self._message_default
 
-    def mysql_insert_query(self) -> str:
-        return f"INSERT INTO `{self.mysql_name}` (`id`, `uid`, `enabled`, `message`) VALUES ('{self.id}', {self.uid}, {int(self.enabled)}, '{self.message}')"
+    def mysql_insert_query(self) -> Tuple[str, tuple]:
+        sql = f"INSERT INTO `{self.mysql_name}` (`id`, `uid`, `enabled`, `message`) VALUES (%s, %s, %s, %s)"
+        return sql, (f"{self.id}", self.uid, int(self.enabled), self.message)
 
-    def mysql_delete_query(self) -> str:
-        return f"DELETE FROM `{self.mysql_name}` WHERE `id` = '{self.id}'"
+    def mysql_delete_query(self) -> Tuple[str, tuple]:
+        return f"DELETE FROM `{self.mysql_name}` WHERE `id` = %s", (f"{self.id}",)
 
-    def mysql_update_query(self) -> str:
-        return f"UPDATE `{self.mysql_name}` SET `uid` = {self.uid}, `enabled` = {int(self.enabled)}, `message` = '{self.message}' WHERE `id` = '{self.id}'"
-
-    def mysql_get_by_id_query(self, target_id="") -> str:
-        if target_id == "":
-            target_id = self.id
-        return f"SELECT * FROM `{self.mysql_name}` WHERE `id` = '{target_id}'"
+    def mysql_update_query(self) -> Tuple[str, tuple]:
+        sql = f"UPDATE `{self.mysql_name}` SET `uid` = %s, `enabled` = %s, `message` = %s WHERE `id` = %s"
+        return sql, (self.uid, int(self.enabled), self.message, f"{self.id}")
 
 
 class ReportMysql:
@@ -668,18 +860,27 @@ class ReportMysql:
     sc_diagram: bool = False  # SC 互动曲线图
     guard_diagram: bool = False  # 大航海互动曲线图
     danmu_cloud: bool = False  # 弹幕词云
+    logo_loaded: bool = True  # 是否已读取立绘内容
 
     mysql_name = "live_report"
+    mysql_columns = ("id", "uid", "enabled", "logo", "logo_base64", "time", "fans_change", "fans_medal_change",
+                     "guard_change", "danmu", "box", "gift", "sc", "guard", "danmu_ranking", "box_ranking",
+                     "box_profit_ranking", "gift_ranking", "sc_ranking", "guard_list", "box_profit_diagram",
+                     "danmu_diagram", "box_diagram", "gift_diagram", "sc_diagram", "guard_diagram", "danmu_cloud")
+    # 读取配置时不包含立绘内容，仅在需要时单独读取
+    mysql_load_columns = tuple(c for c in mysql_columns if c != "logo_base64")
 
     def __init__(self, uid: int):
         self.uid = uid
+        self.logo_loaded = True
 
     def dict_init(self, **args):
         self.id = args.get("id")
         self.uid = args.get("uid")
         self.enabled = args.get("enabled")
         self.logo = args.get("logo")
-        self.logo_base64 = args.get("logo_base64")
+        self.logo_loaded = "logo_base64" in args
+        self.logo_base64 = args.get("logo_base64", "")
         self.time = args.get("time")
         self.fans_change = args.get("fans_change")
         self.fans_medal_change = args.get("fans_medal_change")
@@ -789,11 +990,13 @@ class ReportMysql:
 
     def set_logo(self, logo: str):
         self.logo_base64 = logo
+        self.logo_loaded = True
         if len(logo) > 0:
             self.logo = ""
 
     def clear_logo(self):
         self.logo_base64 = ""
+        self.logo_loaded = True
         self.logo = ""
 
     def set_all_on(self):
@@ -903,35 +1106,36 @@ class ReportMysql:
         func = conf_dict.get(input_arg, lambda v=value: False)
         return func()
 
-    def mysql_insert_query(self) -> str:
-        return str(
-            f"INSERT INTO `{self.mysql_name}` (`id`, `uid`, `enabled`, `logo`, `logo_base64`, `time`, `fans_change`, `fans_medal_change`, `guard_change`, "
-            f"`danmu`, `box`, `gift`, `sc`, `guard`, "
-            f"`danmu_ranking`, `box_ranking`, `box_profit_ranking`, `gift_ranking`, `sc_ranking`, "
-            f"`guard_list`, `box_profit_diagram`, `danmu_diagram`, `box_diagram`, `gift_diagram`, "
-            f"`sc_diagram`, `guard_diagram`, `danmu_cloud`) VALUES ('{self.id}', {self.uid}, {int(self.enabled)}, '{self.logo}', '{self.logo_base64}', {int(self.time)}, "
-            f"{int(self.fans_change)}, {int(self.fans_medal_change)}, {int(self.guard_change)}, {int(self.danmu)}, {int(self.box)}, {int(self.gift)}, "
-            f"{int(self.sc)}, {int(self.guard)}, {self.danmu_ranking}, {self.box_ranking}, {self.box_profit_ranking}, {self.gift_ranking}, {self.sc_ranking}, "
-            f"{int(self.guard_list)}, {int(self.box_profit_diagram)}, {int(self.danmu_diagram)}, {int(self.box_diagram)}, {int(self.gift_diagram)}, "
-            f"{int(self.sc_diagram)}, {int(self.guard_diagram)}, {int(self.danmu_cloud)})")
-
-    def mysql_delete_query(self) -> str:
-        return f"DELETE FROM `{self.mysql_name}` WHERE id = '{self.id}'"
-
-    def mysql_update_query(self) -> str:
-        return str(
-            f"UPDATE `{self.mysql_name}` SET `uid` = {self.uid}, `enabled` = {int(self.enabled)}, `logo` = '{self.logo}', `logo_base64` = '{self.logo_base64}', "
-            f"`time` = {int(self.time)}, `fans_change` = {int(self.fans_change)}, `fans_medal_change` = {int(self.fans_medal_change)}, `guard_change` = {int(self.guard_change)}, "
-            f"`danmu` = {int(self.danmu)}, `box` = {int(self.box)}, `gift` = {int(self.gift)}, `sc` = {int(self.sc)}, `guard` = {int(self.guard)}, "
-            f"`danmu_ranking` = {self.danmu_ranking}, `box_ranking` = {self.box_ranking}, `box_profit_ranking` = {self.box_profit_ranking}, `gift_ranking` = {self.gift_ranking},"
-            f"`sc_ranking` = {self.sc_ranking}, `guard_list` = {int(self.guard_list)}, `box_profit_diagram` = {int(self.box_profit_diagram)}, `danmu_diagram` = {int(self.danmu_diagram)}, "
-            f"`box_diagram` = {int(self.box_diagram)}, `gift_diagram` = {int(self.gift_diagram)}, `sc_diagram` = {int(self.sc_diagram)}, `guard_diagram` = {int(self.guard_diagram)}, "
-            f"`danmu_cloud` = {int(self.danmu_cloud)} WHERE `id` = '{self.id}'")
-
-    def mysql_get_by_id_query(self, target_id="") -> str:
-        if target_id == "":
-            target_id = self.id
-        return f"SELECT * FROM `{self.mysql_name}` WHERE `id` = '{target_id}'"
+    def mysql_values(self, columns) -> tuple:
+        # bool字段按tinyint写入，id统一转为字符串
+        values = []
+        for column in columns:
+            value = getattr(self, column)
+            if column == "id":
+                value = f"{value}"
+            elif isinstance(value, bool):
+                value = int(value)
+            values.append(value)
+        return tuple(values)
+
+    def mysql_insert_query(self) -> Tuple[str, tuple]:
+        columns = ", ".join([f"`{c}`" for c in self.mysql_columns])
+        placeholders = ", ".join(["%s"] * len(self.mysql_columns))
+        sql = f"INSERT INTO `{self.mysql_name}` ({columns}) VALUES ({placeholders})"
+        return sql, self.mysql_values(self.mysql_columns)
+
+    def mysql_delete_query(self) -> Tuple[str, tuple]:
+        return f"DELETE FROM `{self.mysql_name}` WHERE `id` = %s", (f"{self.id}",)
+
+    def mysql_update_query(self) -> Tuple[str, tuple]:
+        # 未读取立绘时保留数据库中的原值
+        update_columns = [c for c in self.mysql_columns if c != "id" and (self.logo_loaded or c != "logo_base64")]
+        assignments = ", ".join([f"`{c}` = %s" for c in update_columns])
+        sql = f"UPDATE `{self.mysql_name}` SET {assignments} WHERE `id` = %s"
+        return sql, self.mysql_values(update_columns) + (f"{self.id}",)
+
+    def mysql_get_logo_query(self) -> Tuple[str, tuple]:
+        return f"SELECT `logo_base64` FROM `{self.mysql_name}` WHERE `id` = %s", (f"{self.id}",)
 
 
 class TargetMysql:
@@ -943,6 +1147,7 @@ class TargetMysql:
     room_id: int = 0
 
     mysql_name = "targets"
+    mysql_columns = ("id", "uid", "num", "type", "uname", "room_id")
 
     def __init__(self, uid: int, num: int, type: PushType = PushType.Group):
         self.uid = uid
@@ -976,17 +1181,22 @@ class TargetMysql:
     def get_uname_and_room_id(self):
         return self.uname, self.room_id
 
-    def mysql_insert_query(self) -> str:
-        return f"INSERT INTO `{self.mysql_name}` (`id`, `uid`, `num`, `type`, `uname`, `room_id`) VALUES ('{self.id}', {self.uid}, {self.num}, {self.type.value}, '{self.uname}', {self.room_id})"
+    def mysql_insert_query(self) -> Tuple[str, tuple]:
+        sql = f"INSERT INTO `{self.mysql_name}` (`id`, `uid`, `num`, `type`, `uname`, `room_id`) VALUES (%s, %s, %s, %s, %s, %s)"
+        return sql, (f"{self.id}", self.uid, self.num, self.type.value, self.uname, self.room_id)
+
+    def mysql_delete_query(self) -> Tuple[str, tuple]:
+        return f"DELETE FROM `{self.mysql_name}` WHERE `id` = %s", (f"{self.id}",)
 
-    def mysql_delete_query(self) -> str:
-        return f"DELETE FROM `{self.mysql_name}` WHERE `id` = '{self.id}'"
+    def mysql_exists_by_uid_and_num_query(self) -> Tuple[str, tuple]:
+        sql = f"SELECT 1 FROM `{self.mysql_name}` WHERE `uid` = %s and `num` = %s and `type` = %s LIMIT 1"
+        return sql, (self.uid, self.num, self.type.value)
 
-    def mysql_get_by_uid_and_num_query(self) -> str:
-        return f"SELECT * FROM `{self.mysql_name}` WHERE `uid` = {self.uid} and `num` = {self.num} and `type` = {self.type.value}"
+    def mysql_exists_by_uid_query(self) -> Tuple[str, tuple]:
+        return f"SELECT 1 FROM `{self.mysql_name}` WHERE `uid` = %s LIMIT 1", (self.uid,)
 
-    def mysql_get_by_uid_query(self) -> str:
-        return f"SELECT * FROM `{self.mysql_name}` WHERE `uid` = {self.uid}"
+    def mysql_count_by_uid_query(self) -> Tuple[str, tuple]:
+        return f"SELECT COUNT(*) AS `count` FROM `{self.mysql_name}` WHERE `uid` = %s", (self.uid,)
 
 
 class ObjMysql:
@@ -998,7 +1208,7 @@ class ObjMysql:
     report: Optional[ReportMysql] = None
 
     datasource: MySQLDataSource = None
-    sql_str: List[str] = []
+    sql_list: List[Tuple[str, tuple]] = []
 
     target_create_flag = False
 
@@ -1010,7 +1220,7 @@ class ObjMysql:
         self.live_off = None
         self.report = None
         self.datasource = Ariadne.options["StarBotDataSource"]
-        self.sql_str = []
+        self.sql_list = []
         self.target_create_flag = False
 
     def __init__(self, mysql: Optional[MySQLDataSource] = None):
@@ -1025,15 +1235,27 @@ class ObjMysql:
         if not self.datasource._MySQLDataSource__pool:
             await self.datasource._MySQLDataSource__connect()
 
-    async def query(self, sql_str):
+    async def query(self, sql_str, args=None):
         # logger.info(f"执行sql语句:{sql_str};")
-        return await self.datasource._MySQLDataSource__query(sql_str + ";")
-
-    async def query_batch(self, str_list):
-        sql_str = ";".join(str_list) + ";"
-        # sql_debug_str = '\n'.join(str_list)
+        return await self.datasource._MySQLDataSource__query(sql_str + ";", args)
+
+    async def query_batch(self, sql_list: List[Tuple[str, tuple]]):
+        # 同一语句模板的参数合并后通过executemany执行，全部语句在同一事务内提交
+        sql_groups: Dict[str, List[tuple]] = {}
+        for sql, args in sql_list:
+            sql_groups.setdefault(sql, []).append(args)
+        # sql_debug_str = '\n'.join(sql_groups.keys())
         # logger.info(f"执行sql语句:{sql_debug_str}")
-        return await self.datasource._MySQLDataSource__query(sql_str)
+        async with self.datasource._MySQLDataSource__pool.acquire() as conn:
+            await conn.begin()
+            try:
+                async with conn.cursor() as cursor:
+                    for sql, args_list in sql_groups.items():
+                        await cursor.executemany(sql, args_list)
+                await conn.commit()
+            except pymysql.err.Error as ex:
+                await conn.rollback()
+                raise DataSourceException(f"写入 MySQL 时发生了错误 {ex}")
 
     async def reload(self, uid):
         up = self.get_up_by_uid(uid)
@@ -1043,11 +1265,92 @@ class ObjMysql:
         if self.target is not None:
             up.uname, _ = self.target.get_uname_and_room_id()
         else:
-            up.uname, _ = await select_uname_and_room_id(uid)
+            up.uname, _ = await select_uname_and_room_id(uid, refresh=True)
         try:
             await self.datasource.reload_targets(up)
         except LiveException as e:
             logger.error(e.msg)
+        if await blob_store.check(self.datasource):
+            await blob_store.resolve_targets(self.datasource, up.targets)
+
+    def build_push_target(self) -> PushTarget:
+        # 与MySQLDataSource读取推送配置时的规则保持一致：未开启或消息为空的配置使用默认值
+        if self.live_on.enabled and self.live_on.message:
+            on = LiveOn(enabled=True, message=self.live_on.message)
+        else:
+            on = LiveOn()
+        if self.live_off.enabled and self.live_off.message:
+            off = LiveOff(enabled=True, message=self.live_off.message)
+        else:
+            off = LiveOff()
+        if self.report.enabled:
+            report_columns = [c for c in self.report.mysql_columns if c not in ("id", "uid")]
+            report = LiveReport(**{c: getattr(self.report, c) for c in report_columns})
+        else:
+            report = LiveReport()
+        if self.dynamic.enabled and self.dynamic.message:
+            update = DynamicUpdate(enabled=True, message=self.dynamic.message)
+        else:
+            update = DynamicUpdate()
+        return PushTarget(
+            id=self.target.num,
+            type=self.target.type,
+            live_on=on,
+            live_off=off,
+            live_report=report,
+            dynamic_update=update
+        )
+
+    async def patch_target(self, uid, remove: bool = False):
+        # 将本次写入的推送目标变更直接应用到内存中的Up，不再从MySQL重新读取全部推送配置
+        up = self.get_up_by_uid(uid)
+        if up is None:
+            raise DataSourceException(f"不存在的 UID: {uid}")
+        # 强制刷新内存中uname以解决内存中昵称不会同步更新的问题
+        uname, _ = self.target.get_uname_and_room_id()
+        if uname:
+            up.uname = uname
+        num = self.target.num
+        push_type = self.target.type
+        need_connect = up.is_need_connect()
+        push_target = None
+        if not remove:
+            if not self.report.logo_loaded:
+                await self.load_report_logo(up)
+            push_target = self.build_push_target()
+            if await blob_store.check(self.datasource):
+                await blob_store.resolve_targets(self.datasource, [push_target])
+        targets = []
+        replaced = False
+        for target in up.targets:
+            if target.id == num and target.type == push_type:
+                if not remove:
+                    targets.append(push_target)
+                replaced = True
+                continue
+            targets.append(target)
+        if not remove and not replaced:
+            targets.append(push_target)
+        up.targets = targets
+        up_index.update_up(self.datasource, up)
+        # 仅在是否需要连接直播间发生变化时处理连接状态
+        if need_connect != up.is_need_connect():
+            try:
+                await up.auto_reload_connect()
+            except LiveException as e:
+                logger.error(e.msg)
+
+    async def load_report_logo(self, up: Up):
+        # 配置读取时未包含立绘，内存中已开启直播报告的推送目标中保存有立绘内容，否则从数据库读取
+        for target in up.targets:
+            if target.id == self.target.num and target.type == self.target.type and target.live_report.enabled:
+                self.report.logo_base64 = target.live_report.logo_base64
+                break
+        else:
+            sql, args = self.report.mysql_get_logo_query()
+            rows = await self.query(sql, args)
+            self.report.logo_base64 = (rows[0]["logo_base64"] or "") if len(rows) > 0 else ""
+        self.report.logo_loaded = True
 
     async def remove_up(self, uid):
         up = self.get_up_by_uid(uid)
@@ -1058,24 +1361,18 @@ class ObjMysql:
 
     async def load_new(self, uid):
         await self.datasource.load_new(uid)
+        up = self.get_up_by_uid(uid)
+        if up is not None and await blob_store.check(self.datasource):
+            await blob_store.resolve_targets(self.datasource, up.targets)
 
     def get_uid_list(self) -> List[int]:
         return self.datasource.get_uid_list()
 
     def get_all_groups_and_friends(self):
-        ups: List[Up] = self.datasource.get_up_list()
-        group_set = set()
-        friend_set = set()
-        for up in ups:
-            for target in up.targets:
-                if target.type == PushType.Group:
-                    group_set.add(target.id)
-                if target.type == PushType.Friend:
-                    friend_set.add(target.id)
-        return group_set, friend_set
+        return up_index.get_groups_and_friends(self.datasource)
 
     def get_up_list_by_num_origin(self, num: int, push_type: PushType = PushType.Group) -> List:
-        ups: List[Up] = self.datasource.get_ups_by_target(num, push_type)
+        ups: List[Up] = up_index.get_ups_by_target(self.datasource, num, push_type)
         return ups
 
     async def get_up_list_with_pic_struct(self) -> List:
@@ -1109,7 +1406,7 @@ class ObjMysql:
         return up_list
 
     async def get_ups_by_target_with_pic_struct(self, num: int, p_type: PushType = PushType.Group) -> List:
-        ups: List[Up] = self.datasource.get_ups_by_target(num, p_type)
+        ups: List[Up] = up_index.get_ups_by_target(self.datasource, num, p_type)
         up_list = []
         for up in ups:
             push_type = []
@@ -1134,27 +1431,23 @@ class ObjMysql:
     def get_ups_by_targets(self, friend_set: set, group_set: set) -> List:
         up_list = []
         for f in friend_set:
-            ups: List[Up] = self.datasource.get_ups_by_target(f, PushType.Friend)
+            ups: List[Up] = up_index.get_ups_by_target(self.datasource, f, PushType.Friend)
             for up in ups:
                 up_list.append((up.uid, f))
         for g in group_set:
-            ups: List[Up] = self.datasource.get_ups_by_target(g, PushType.Group)
+            ups: List[Up] = up_index.get_ups_by_target(self.datasource, g, PushType.Group)
             for up in ups:
                 up_list.append((up.uid, g))
         return up_list
 
     def get_up_by_uid(self, uid: int) -> Optional[Up]:
-        ups: List[Up] = self.datasource.get_up_list()
-        for up in ups:
-            if f"{up.uid}" == f"{uid}":  # 用int值直接比较无法得到预期结果，通过转换为字符串比较规避问题，根因暂未找到
-                return up
-        return None
+        # 数据源中的uid可能为str或int，索引构建时已统一转换为int
+        return up_index.get_up(self.datasource, uid)
 
     def get_target_uname_and_roomid(self):
         return self.target.get_uname_and_room_id()
 
     def set_message_inner(self, message_type: str, message: str = ""):
-        message = message.replace('\\', '\\\\')
         if message_type == "news":
             self.dynamic.set_message(message)
             return
@@ -1232,13 +1525,6 @@ class ObjMysql:
         self.set_report_message(atall)
         self.set_report_inner(report)
 
-    async def set_bot_id(self):
-        bots = await self.query(self.bot.mysql_get_by_bot_and_uid_query())
-        if len(bots) > 0:
-            self.bot.set_id(bots[0].get("id"))
-        else:
-            self.bot.set_id(0)
-
     def set_report_logo(self, logo: str):
         self.report.set_logo(logo)
 
@@ -1248,19 +1534,41 @@ class ObjMysql:
     def config_report(self, input_arg: str, input_str: str):
         return self.report.config(input_arg, input_str)
 
+    def mysql_get_all_query(self) -> Tuple[str, tuple]:
+        # 一次JOIN查询取回bot记录、target记录及四张配置表记录，列名以"表名__列名"区分
+        tables = [self.bot, self.target, self.dynamic, self.live_on, self.live_off, self.report]
+        columns = ", ".join([f"`{t.mysql_name}`.`{c}` AS `{t.mysql_name}__{c}`"
+                             for t in tables for c in getattr(t, "mysql_load_columns", t.mysql_columns)])
+        sql = (
+            f"SELECT {columns} FROM (SELECT 1) AS `placeholder` "
+            f"LEFT JOIN `{self.bot.mysql_name}` ON `{self.bot.mysql_name}`.`bot` = %s "
+            f"AND `{self.bot.mysql_name}`.`uid` = %s "
+            f"LEFT JOIN `{self.target.mysql_name}` ON `{self.target.mysql_name}`.`uid` = %s "
+            f"AND `{self.target.mysql_name}`.`num` = %s "
+            f"AND `{self.target.mysql_name}`.`type` = %s "
+            + " ".join([f"LEFT JOIN `{t.mysql_name}` ON `{t.mysql_name}`.`id` = `{self.target.mysql_name}`.`id`"
+                        for t in tables[2:]])
+            + " LIMIT 1")
+        return sql, (self.bot.bot, self.bot.uid, self.target.uid, self.target.num, self.target.type.value)
+
     async def query_targets(self):
-        target = await self.query(self.target.mysql_get_by_uid_and_num_query())
-        if len(target) > 0:
-            target_id = target[0].get("id")
-            self.target.dict_init(**target[0])
-            dynamic = await self.query(self.dynamic.mysql_get_by_id_query(target_id))
-            live_on = await self.query(self.live_on.mysql_get_by_id_query(target_id))
-            live_off = await self.query(self.live_off.mysql_get_by_id_query(target_id))
-            report = await self.query(self.report.mysql_get_by_id_query(target_id))
-            self.dynamic.dict_init(**dynamic[0])
-            self.live_on.dict_init(**live_on[0])
-            self.live_off.dict_init(**live_off[0])
-            self.report.dict_init(**report[0])
+        rows = await self.query(*self.mysql_get_all_query())
+        row_map = {}
+        for key, value in (rows[0] if len(rows) > 0 else {}).items():
+            table, column = key.split("__", 1)
+            row_map.setdefault(table, {})[column] = value
+        bot_row = row_map.get(self.bot.mysql_name, {})
+        self.bot.set_id(bot_row.get("id") or 0)
+        target_row = row_map.get(self.target.mysql_name, {})
+        if target_row.get("id") is not None:
+            target_id = target_row.get("id")
+            self.target.dict_init(**target_row)
+            for obj in [self.dynamic, self.live_on, self.live_off, self.report]:
+                obj_row = row_map.get(obj.mysql_name, {})
+                if obj_row.get("id") is not None:
+                    obj.dict_init(**obj_row)
+                else:
+                    obj.set_id(target_id)
         else:
             target_id = uuid.uuid1()
             self.target_create_flag = True
@@ -1273,134 +1581,186 @@ class ObjMysql:
     async def init_target(self, bot: int, uid: int, num: int, type: PushType = PushType.Group):
         await self.connect()
         self.bot = BotMysql(bot, uid)
-        await self.set_bot_id()
         self.target = TargetMysql(uid, num, type)
         self.dynamic = DynamicMysql(uid)
         self.live_on = LiveOnMysql(uid)
         self.live_off = LiveOffMysql(uid)
         self.report = ReportMysql(uid)
+        # bot、target及配置表在同一次查询中取回，避免多次往返数据库
         await self.query_targets()
-        await self.target.set_uname_and_room_id()
-
-    async def trans_targets(self, bot, uid, num, target):
-        dynamic = target.get("dynamic_update")
-        live_on = target.get("live_on")
-        live_off = target.get("live_off")
-        report = target.get("live_report")
-        type = target.get("type")
-        await self.connect()
-        self.bot = BotMysql(bot, uid)
-        await self.set_bot_id()
-        self.target = TargetMysql(uid, num, type)
+        # 内存中的Up已有昵称和房间号时直接使用，昵称刷新通过重载订阅完成
+        up = self.get_up_by_uid(uid)
+        if up is not None and up.uname and up.room_id:
+            self.target.uname, self.target.room_id = up.uname, up.room_id
+        else:
+            await self.target.set_uname_and_room_id()
+        return self
+
+    def fill_trans_targets(self, uid, num, target, target_id):
+        # 将内存数据源中的推送目标配置写入各表对象，不访问数据库和网络
+        self.target = TargetMysql(uid, num, target.get("type"))
         self.dynamic = DynamicMysql(uid)
         self.live_on = LiveOnMysql(uid)
         self.live_off = LiveOffMysql(uid)
         self.report = ReportMysql(uid)
-        target_mysql = await self.query(self.target.mysql_get_by_uid_and_num_query())
-        if len(target_mysql) > 0:
-            target_id = target_mysql[0].get("id")
-        else:
-            target_id = uuid.uuid1()  # 使用uuid1确保表主键不重复
-            self.target_create_flag = True
         self.target.dict_trans(**target)
         self.target.set_id(target_id)
         self.target.set_uid(uid)
-        self.dynamic.dict_trans(**dynamic)
+        self.dynamic.dict_trans(**target.get("dynamic_update"))
         self.dynamic.set_id(target_id)
         self.dynamic.set_uid(uid)
-        self.live_on.dict_trans(**live_on)
+        self.live_on.dict_trans(**target.get("live_on"))
         self.live_on.set_id(target_id)
         self.live_on.set_uid(uid)
-        self.live_off.dict_trans(**live_off)
+        self.live_off.dict_trans(**target.get("live_off"))
         self.live_off.set_id(target_id)
         self.live_off.set_uid(uid)
-        self.report.dict_trans(**report)
+        self.report.dict_trans(**target.get("live_report"))
         self.report.set_id(target_id)
         self.report.set_uid(uid)
-        await self.target.set_uname_and_room_id()
 
     async def check_uid_exist(self, uid: int, num: int, push_type: PushType = PushType.Group):
         target = TargetMysql(uid, num, push_type)
-        target_mysql = await self.query(target.mysql_get_by_uid_and_num_query())
+        target_mysql = await self.query(*target.mysql_exists_by_uid_and_num_query())
         if len(target_mysql) == 0:
             return False
         return True
 
     async def check_uid_exist_with_all(self, uid: int):
         target = TargetMysql(uid, 0, PushType.Group)
-        target_mysql = await self.query(target.mysql_get_by_uid_query())
+        target_mysql = await self.query(*target.mysql_exists_by_uid_query())
         if len(target_mysql) == 0:
             return False
         return True
 
     async def clean_describe(self, bot: int, num: int, push_type: PushType = PushType.Group):
-        ups: List[Up] = self.get_up_list_by_num_origin(num, push_type)
-        for up in ups:
-            await self.init_target(bot, up.uid, num, push_type)
-            await self.delete()
+        await self.delete_targets(bot, {(num, push_type)})
+
+    async def delete_targets(self, bot: int, targets: set):
+        # 按(群号/QQ号, 推送类型)集合批量删除订阅，全部语句在同一事务内执行
+        if len(targets) == 0:
+            return
+        await self.connect()
+        keys = [(int(num), PushType(push_type)) for num, push_type in targets]
+        config_tables = [DynamicMysql.mysql_name, LiveOnMysql.mysql_name, LiveOffMysql.mysql_name,
+                         ReportMysql.mysql_name]
+        async with self.datasource._MySQLDataSource__pool.acquire() as conn:
+            await conn.begin()
+            try:
+                async with conn.cursor() as cursor:
+                    rows = []
+                    for chunk in split_chunks(keys, 500):
+                        placeholders = ", ".join(["(%s, %s)"] * len(chunk))
+                        args = [v for num, push_type in chunk for v in (num, push_type.value)]
+                        await cursor.execute(
+                            f"SELECT `id`, `uid` FROM `{TargetMysql.mysql_name}` "
+                            f"WHERE (`num`, `type`) IN ({placeholders})", args)
+                        rows.extend(await cursor.fetchall())
+                    target_ids = [row[0] for row in rows]
+                    uids = list({int(row[1]) for row in rows})
+                    for chunk in split_chunks(target_ids, 500):
+                        placeholders = ", ".join(["%s"] * len(chunk))
+                        for table in config_tables + [TargetMysql.mysql_name]:
+                            await cursor.execute(f"DELETE FROM `{table}` WHERE `id` IN ({placeholders})", chunk)
+                    # 删除后不再有任何推送目标的uid即为需要移除的UP
+                    remain_uids = set()
+                    for chunk in split_chunks(uids, 500):
+                        placeholders = ", ".join(["%s"] * len(chunk))
+                        await cursor.execute(
+                            f"SELECT DISTINCT `uid` FROM `{TargetMysql.mysql_name}` WHERE `uid` IN ({placeholders})",
+                            chunk)
+                        remain_uids.update(int(row[0]) for row in await cursor.fetchall())
+                    orphan_uids = [uid for uid in uids if uid not in remain_uids]
+                    for chunk in split_chunks(orphan_uids, 500):
+                        placeholders = ", ".join(["%s"] * len(chunk))
+                        await cursor.execute(
+                            f"DELETE FROM `{BotMysql.mysql_name}` WHERE `bot` = %s AND `uid` IN ({placeholders})",
+                            [bot] + chunk)
+                await conn.commit()
+            except pymysql.err.Error as ex:
+                await conn.rollback()
+                raise DataSourceException(f"批量删除订阅时发生了错误 {ex}")
+        # 同步内存中的推送配置
+        key_set = set(keys)
+        orphan_ups: List[Up] = []
+        for uid in uids:
+            up = self.get_up_by_uid(uid)
+            if up is None:
+                continue
+            if uid not in remain_uids:
+                orphan_ups.append(up)
+                continue
+            need_connect = up.is_need_connect()
+            up.targets = [t for t in up.targets if (int(t.id), PushType(t.type)) not in key_set]
+            up_index.update_up(self.datasource, up)
+            if need_connect != up.is_need_connect():
+                try:
+                    await up.auto_reload_connect()
+                except LiveException as e:
+                    logger.error(e.msg)
+        if len(orphan_ups) == 0:
+            return
+        for up in orphan_ups:
+            await up.disconnect()
+        orphan_set = {int(up.uid) for up in orphan_ups}
+        for b in self.datasource.bots:
+            b.ups = [up for up in b.ups if int(up.uid) not in orphan_set]
+        self.datasource.format_data()
+        for up in orphan_ups:
+            await unfollow_up(up.uid, up.uname, up.room_id)
 
     # insert and update
     async def save(self):
         uid: int = self.get_target_uid()
+        if get_config("MYSQL_BLOB_STORE") and await blob_store.check(self.datasource):
+            # 图片内容写入blob表，配置表中只保存引用
+            self.sql_list.extend(blob_store.externalize(self))
         if self.bot.get_id() == 0:
-            self.sql_str.append(self.bot.mysql_insert_query())
+            self.sql_list.append(self.bot.mysql_insert_query())
         if self.target_create_flag:
-            self.sql_str.append(self.target.mysql_insert_query())
-            self.sql_str.append(self.dynamic.mysql_insert_query())
-            self.sql_str.append(self.live_on.mysql_insert_query())
-            self.sql_str.append(self.live_off.mysql_insert_query())
-            self.sql_str.append(self.report.mysql_insert_query())
+            self.sql_list.append(self.target.mysql_insert_query())
+            self.sql_list.append(self.dynamic.mysql_insert_query())
+            self.sql_list.append(self.live_on.mysql_insert_query())
+            self.sql_list.append(self.live_off.mysql_insert_query())
+            self.sql_list.append(self.report.mysql_insert_query())
         else:
-            self.sql_str.append(self.dynamic.mysql_update_query())
-            self.sql_str.append(self.live_on.mysql_update_query())
-            self.sql_str.append(self.live_off.mysql_update_query())
-            self.sql_str.append(self.report.mysql_update_query())
-        await self.query_batch(self.sql_str)
+            self.sql_list.append(self.dynamic.mysql_update_query())
+            self.sql_list.append(self.live_on.mysql_update_query())
+            self.sql_list.append(self.live_off.mysql_update_query())
+            self.sql_list.append(self.report.mysql_update_query())
+        await self.query_batch(self.sql_list)
         if self.bot.get_id() == 0:
             await self.load_new(uid)
         else:
-            await self.reload(uid)
+            await self.patch_target(uid)
 
-    async def trans_save(self):
-        if self.bot.get_id() == 0:
-            self.sql_str.append(self.bot.mysql_insert_query())
+    def trans_statements(self) -> List[Tuple[str, tuple]]:
         if self.target_create_flag:
-            self.sql_str.append(self.target.mysql_insert_query())
-            self.sql_str.append(self.dynamic.mysql_insert_query())
-            self.sql_str.append(self.live_on.mysql_insert_query())
-            self.sql_str.append(self.live_off.mysql_insert_query())
-            self.sql_str.append(self.report.mysql_insert_query())
-            await self.query_batch(self.sql_str)
-        else:
-            self.sql_str.append(self.dynamic.mysql_update_query())
-            self.sql_str.append(self.live_on.mysql_update_query())
-            self.sql_str.append(self.live_off.mysql_update_query())
-            self.sql_str.append(self.report.mysql_update_query())
-            await self.query_batch(self.sql_str)
+            return [self.target.mysql_insert_query(),
+                    self.dynamic.mysql_insert_query(),
+                    self.live_on.mysql_insert_query(),
+                    self.live_off.mysql_insert_query(),
+                    self.report.mysql_insert_query()]
+        return [self.dynamic.mysql_update_query(),
+                self.live_on.mysql_update_query(),
+                self.live_off.mysql_update_query(),
+                self.report.mysql_update_query()]
 
     # delete
     async def delete(self):
         uid: int = self.get_target_uid()
-        self.sql_str.append(self.target.mysql_delete_query())
-        self.sql_str.append(self.dynamic.mysql_delete_query())
-        self.sql_str.append(self.live_on.mysql_delete_query())
-        self.sql_str.append(self.live_off.mysql_delete_query())
-        self.sql_str.append(self.report.mysql_delete_query())
-        targets = await self.query(self.target.mysql_get_by_uid_query())
-        if targets is not None and len(targets) <= 1:
-            self.sql_str.append(self.bot.mysql_delete_query())
-            await self.query_batch(self.sql_str)
+        self.sql_list.append(self.target.mysql_delete_query())
+        self.sql_list.append(self.dynamic.mysql_delete_query())
+        self.sql_list.append(self.live_on.mysql_delete_query())
+        self.sql_list.append(self.live_off.mysql_delete_query())
+        self.sql_list.append(self.report.mysql_delete_query())
+        targets = await self.query(*self.target.mysql_count_by_uid_query())
+        if targets is not None and targets[0]["count"] <= 1:
+            self.sql_list.append(self.bot.mysql_delete_query())
+            await self.query_batch(self.sql_list)
             await self.remove_up(uid)
             uname, room_id = self.get_target_uname_and_roomid()
-            try:
-                unfollow_user = User(uid, get_credential())
-                await unfollow_user.modify_relation(RelationType.UNSUBSCRIBE)
-                logger.success(f"自动取消关注成功 {uname} (UID: {uid} 房间号: {room_id})")
-            except ResponseCodeException as e:
-                if e.code == 22115 or e.code == 22007:
-                    logger.warning(f"读取登录账号的关注列表失败, 请检查登录凭据是否已失效, 错误信息: {e.msg}")
-            except Exception as e:
-                logger.exception(f"取消关注异常 {uid = }\n", e)
+            await unfollow_up(uid, uname, room_id)
         else:
-            await self.query_batch(self.sql_str)
-            await self.reload(uid)
+            await self.query_batch(self.sql_list)
+            await self.patch_target(uid, remove=True)
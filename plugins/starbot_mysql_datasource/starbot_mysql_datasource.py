@@ -1,7 +1,9 @@
 import asyncio
+import base64
 from typing import List, Optional, Union
 from creart import create
 from graia.ariadne import Ariadne
+from graia.ariadne.event.lifecycle import ApplicationShutdown
 from graia.ariadne.event.message import FriendMessage, GroupMessage
 from graia.ariadne.message.chain import MessageChain
 from graia.ariadne.message.element import At, Image, AtAll, Plain
@@ -22,7 +24,11 @@ from starbot.core.bot import StarBot
 from .mysql_utils import ObjMysql, check_not_mysql_datasource, check_mysql_datasource, create_auto_follow_task, \
     draw_image_pic, draw_pic, check_at_object, get_message_help, select_uname_and_room_id, get_logger_prefix, \
     default_help, check_bot_mode_public, set_bot_mode_private, set_bot_mode_public, element_get_bytes, \
-    append_report_help
+    append_report_help, draw_help_pic, split_list_pages, send_image, create_blob_resolve_task, normalize_image_bytes
+from .mysql_painter import pic_cache, encode_stats, pic_renderer
+from .mysql_media import media_client
+from .mysql_blob import blob_store
+from .mysql_config import get_config
 from .mysql_trans import datasource_trans_to_mysql, datasource_trans_to_json
 
 prefix = config.get("COMMAND_PREFIX")
@@ -31,6 +37,16 @@ master_qq = config.get("MASTER_QQ")
 channel = Channel.current()
 inc = create(InterruptControl)
 
+# 插件在数据源载入后导入，此时将订阅中的blob引用替换为图片内容
+if check_mysql_datasource():
+    create_blob_resolve_task()
+
+
+@channel.use(ListenerSchema(listening_events=[ApplicationShutdown]))
+async def _Shutdown():
+    pic_renderer.shutdown()
+    await media_client.close()
+
 add_describe = ["添加订阅", "新增订阅", "watch"]
 delete_describe = ["删除订阅", "取消订阅", "unwatch"]
 list_describe = ["查询订阅", "订阅内容", "list"]
@@ -45,6 +61,7 @@ check_describe_abnormal = ["检测异常订阅", "checkabnormal"]
 clear_describe_abnormal = ["清除异常订阅", "clearabnormal"]
 trans_to_mysql = ["数据源转储", "datasourcetrans"]
 save_json = ["数据源转存json"]
+blob_gc = ["清理图片存储", "blobgc"]
 ping = ["ping"]
 get_status = ["status"]
 bot_mode = ["模式", "mode"]
@@ -116,6 +133,7 @@ describe_cmd = {
                             f"示例: {prefix}{list_describe[0]}"],
         "describe_admin": [f"{prefix}[{' | '.join(list_describe)}]",
                            "可选参数：[-t | --text] 使用文字模式发送",
+                           "可选参数：[-p | --page] 页码，图片模式下仅发送指定页，不填发送全部页",
                            "查询所有订阅信息",
                            f"示例: {prefix}{list_describe[0]}"],
     },
@@ -239,8 +257,18 @@ describe_cmd = {
         "describe_group": [],
         "describe_friend": [],
         "describe_admin": [f"{prefix}[{' | '.join(save_json)}]" if len(save_json) > 1 else f"{prefix}{save_json[0]}",
+                           "可选参数：[-z | --gzip] 使用gzip压缩输出文件",
                            "该命令在mysql数据源下使用，用处是将内存中的订阅信息转存为json数据源文件",
-                           f"示例: {prefix}{save_json[0]}"]
+                           f"示例: {prefix}{save_json[0]}",
+                           f"示例: {prefix}{save_json[0]} -z"]
+    },
+    blob_gc[0]: {
+        "cmd": blob_gc,
+        "describe_group": [],
+        "describe_friend": [],
+        "describe_admin": [f"{prefix}[{' | '.join(blob_gc)}]" if len(blob_gc) > 1 else f"{prefix}{blob_gc[0]}",
+                           "删除blob表中已不被任何订阅引用的立绘及推送图片",
+                           f"示例: {prefix}{blob_gc[0]}"]
     },
     ping[0]: {
         "cmd": ping,
@@ -300,7 +328,7 @@ async def _AddListenGroup(app: Ariadne, sender: Group, member: Member, message:
     logger_prefix = get_logger_prefix(cmd.display, sender, member)
     if uid == "" or not uid.isdigit():
         logger.info(f"{logger_prefix} uid输入不合法({uid})")
-        await app.send_message(sender, MessageChain(draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
+        await app.send_message(sender, MessageChain(await draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
         return
     uid = int(uid)
     group = sender.id
@@ -310,8 +338,7 @@ async def _AddListenGroup(app: Ariadne, sender: Group, member: Member, message:
         person = await app.get_member(group, member.id)
         if person.permission < MemberPerm.Administrator:
             logger.info(f"{logger_prefix} 权限不足({member.id = }, {person.permission = })")
-            await app.send_message(sender,
-                                   MessageChain(draw_pic("权限不足，操作失败，仅群管理员和群主可操作", width=800)))
+            await send_image(app, sender, await draw_pic("权限不足，操作失败，仅群管理员和群主可操作", width=800))
             return
     obj_mysql = ObjMysql()
     await obj_mysql.init_target(bot, uid, group)
@@ -320,7 +347,7 @@ async def _AddListenGroup(app: Ariadne, sender: Group, member: Member, message:
     uname, _ = obj_mysql.get_target_uname_and_roomid()
     create_auto_follow_task()
     logger.info(f"{logger_prefix} 成功 [{uname}]({uid})")
-    await app.send_message(sender, MessageChain(draw_pic(f"{uname}(UID:{uid}){cmd.display}成功", width=800)))
+    await app.send_message(sender, MessageChain(await draw_pic(f"{uname}(UID:{uid}){cmd.display}成功", width=800)))
 
 
 @channel.use(
@@ -351,7 +378,7 @@ async def _AddListenFriend(app: Ariadne, sender: Friend, cmd: MessageChain = Res
     logger_prefix = get_logger_prefix(cmd.display, sender)
     if uid == "" or not uid.isdigit():
         logger.info(f"{logger_prefix} uid输入不合法({uid})")
-        await app.send_message(sender, MessageChain(draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
+        await app.send_message(sender, MessageChain(await draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
         return
     uid = int(uid)
     bot = app.account
@@ -363,7 +390,7 @@ async def _AddListenFriend(app: Ariadne, sender: Friend, cmd: MessageChain = Res
         group_check = await app.get_group(group)
         if group_check is None:
             logger.info(f"{logger_prefix} bot未加入群聊({group})")
-            await app.send_message(sender, MessageChain(draw_pic(f"bot未加入群聊({group})，操作失败", width=800)))
+            await app.send_message(sender, MessageChain(await draw_pic(f"bot未加入群聊({group})，操作失败", width=800)))
             return
         source = group
         source_type = PushType.Group
@@ -372,7 +399,7 @@ async def _AddListenFriend(app: Ariadne, sender: Friend, cmd: MessageChain = Res
         friend_check = await app.get_friend(sender.id)
         if friend_check is None:
             logger.info(f"{logger_prefix} bot未添加好友({sender.id})")
-            await app.send_message(sender, MessageChain(draw_pic(f"bot未添加好友({sender.id})，操作失败", width=800)))
+            await app.send_message(sender, MessageChain(await draw_pic(f"bot未添加好友({sender.id})，操作失败", width=800)))
             return
         source = sender.id
         source_type = PushType.Friend
@@ -385,7 +412,7 @@ async def _AddListenFriend(app: Ariadne, sender: Friend, cmd: MessageChain = Res
     uname, _ = obj_mysql.get_target_uname_and_roomid()
     create_auto_follow_task()
     logger.info(f"{logger_prefix} 成功 {msg_prefix}[{uname}]({uid})")
-    await app.send_message(sender, MessageChain(draw_pic(f"{msg_prefix}{uname}(UID:{uid}){cmd.display}成功")))
+    await app.send_message(sender, MessageChain(await draw_pic(f"{msg_prefix}{uname}(UID:{uid}){cmd.display}成功")))
 
 
 @channel.use(
@@ -409,7 +436,7 @@ async def _DelListenGroup(app: Ariadne, sender: Group, member: Member, message:
     logger_prefix = get_logger_prefix(cmd.display, sender, member)
     if uid == "" or not uid.isdigit():
         logger.info(f"{logger_prefix} uid输入不合法({uid})")
-        await app.send_message(sender, MessageChain(draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
+        await app.send_message(sender, MessageChain(await draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
         return
     uid = int(uid)
     group = sender.id
@@ -420,19 +447,19 @@ async def _DelListenGroup(app: Ariadne, sender: Group, member: Member, message:
         person = await app.get_member(group, member.id)
         if person.permission < MemberPerm.Administrator:
             logger.info(f"{logger_prefix} 权限不足({member.id = }, {person.permission = })")
-            await app.send_message(sender, MessageChain(draw_pic("权限不足，操作失败，仅群管理员和群主可操作", width=800)))
+            await send_image(app, sender, await draw_pic("权限不足，操作失败，仅群管理员和群主可操作", width=800))
             return
     obj_mysql = ObjMysql()
     result = await obj_mysql.check_uid_exist(uid, group)
     if not result:
         logger.info(f"{logger_prefix} uid未被订阅({uid = })")
-        await app.send_message(sender, MessageChain(draw_pic("uid未被订阅，操作失败", width=800)))
+        await send_image(app, sender, await draw_pic("uid未被订阅，操作失败", width=800))
         return
     await obj_mysql.init_target(bot, uid, group)
     await obj_mysql.delete()
     uname, _ = obj_mysql.get_target_uname_and_roomid()
     logger.info(f"{logger_prefix} 成功 {uname}({uid})")
-    await app.send_message(sender, MessageChain(draw_pic(f"{uname}(UID:{uid}){cmd.display}成功", width=800)))
+    await app.send_message(sender, MessageChain(await draw_pic(f"{uname}(UID:{uid}){cmd.display}成功", width=800)))
 
 
 @channel.use(
@@ -455,7 +482,7 @@ async def _DelListenFriend(app: Ariadne, sender: Friend, cmd: MessageChain = Res
     logger_prefix = get_logger_prefix(cmd.display, sender)
     if uid == "" or not uid.isdigit():
         logger.info(f"{logger_prefix} uid输入不合法({uid})")
-        await app.send_message(sender, MessageChain(draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
+        await app.send_message(sender, MessageChain(await draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
         return
     uid = int(uid)
     bot = app.account
@@ -477,13 +504,13 @@ async def _DelListenFriend(app: Ariadne, sender: Friend, cmd: MessageChain = Res
     result = await obj_mysql.check_uid_exist(uid, source, source_type)
     if not result:
         logger.info(f"{logger_prefix} uid未被订阅({uid = })")
-        await app.send_message(sender, MessageChain(draw_pic("uid未被订阅，操作失败", width=800)))
+        await send_image(app, sender, await draw_pic("uid未被订阅，操作失败", width=800))
         return
     await obj_mysql.init_target(bot, uid, source, source_type)
     await obj_mysql.delete()
     uname, _ = obj_mysql.get_target_uname_and_roomid()
     logger.info(f"{logger_prefix} 成功 {msg_prefix}[{uname}]({uid})")
-    await app.send_message(sender, MessageChain(draw_pic(f"{msg_prefix}{uname}(UID:{uid}){cmd.display}成功")))
+    await app.send_message(sender, MessageChain(await draw_pic(f"{msg_prefix}{uname}(UID:{uid}){cmd.display}成功")))
 
 
 @channel.use(
@@ -504,14 +531,19 @@ async def _TransToMysql(app: Ariadne, sender: Friend, cmd: MessageChain = Result
         return
     logger_prefix = get_logger_prefix(cmd.display, sender)
     logger.info(f"{logger_prefix}")
-    await app.send_message(sender, MessageChain(draw_pic(f"{cmd.display} 正在执行...", width=800)))
-    result, message = await datasource_trans_to_mysql()
+    await send_image(app, sender, await draw_pic(f"{cmd.display} 正在执行...", width=800))
+
+    async def report_progress(done: int, total: int):
+        logger.info(f"{logger_prefix} 进度 {done}/{total}")
+        await app.send_message(sender, MessageChain(f"{cmd.display} 已写入 {done}/{total} 个推送目标"))
+
+    result, message = await datasource_trans_to_mysql(report_progress)
     if not result:
         logger.info(f"{logger_prefix} 失败，原因：{message}")
-        await app.send_message(sender, MessageChain(draw_pic(f"{cmd.display} 失败，原因：{message}")))
+        await app.send_message(sender, MessageChain(await draw_pic(f"{cmd.display} 失败，原因：{message}")))
         return
     logger.info(f"{logger_prefix} 成功")
-    await app.send_message(sender, MessageChain(draw_pic(f"{cmd.display} 成功", width=800)))
+    await send_image(app, sender, await draw_pic(f"{cmd.display} 成功", width=800))
 
 
 @channel.use(
@@ -520,11 +552,13 @@ async def _TransToMysql(app: Ariadne, sender: Friend, cmd: MessageChain = Result
         inline_dispatchers=[Twilight(
             ElementMatch(At, optional=True),
             FullMatch(prefix),
-            "cmd" @ UnionMatch(*save_json)
+            "cmd" @ UnionMatch(*save_json),
+            "gzip_flag" @ ArgumentMatch("-z", "--gzip", action="store_true", default=False),
         )],
     )
 )
-async def _TransToJson(app: Ariadne, sender: Friend, cmd: MessageChain = ResultValue()):
+async def _TransToJson(app: Ariadne, sender: Friend, cmd: MessageChain = ResultValue(),
+                       gzip_flag: bool = ResultValue()):
     if check_not_mysql_datasource():
         return
     if master_qq == "" or master_qq != sender.id:
@@ -532,14 +566,14 @@ async def _TransToJson(app: Ariadne, sender: Friend, cmd: MessageChain = ResultV
         return
     logger_prefix = get_logger_prefix(cmd.display, sender)
     logger.info(f"{logger_prefix}")
-    await app.send_message(sender, MessageChain(draw_pic(f"{cmd.display} 正在执行...", width=800)))
-    result, message = datasource_trans_to_json()
+    await send_image(app, sender, await draw_pic(f"{cmd.display} 正在执行...", width=800))
+    result, message = await datasource_trans_to_json(gzip_flag)
     if not result:
         logger.info(f"{logger_prefix} 失败，原因：{message}")
-        await app.send_message(sender, MessageChain(draw_pic(f"{cmd.display} 失败，原因：{message}")))
+        await app.send_message(sender, MessageChain(await draw_pic(f"{cmd.display} 失败，原因：{message}")))
         return
     logger.info(f"{logger_prefix} 成功")
-    await app.send_message(sender, MessageChain(draw_pic([f"{cmd.display} 成功",
+    await app.send_message(sender, MessageChain(await draw_pic([f"{cmd.display} 成功",
                                                           f"文件保存在main.py同级目录下",
                                                           f"文件名：{message}"])))
 
@@ -574,7 +608,7 @@ async def _GetUpList(app: Ariadne, sender: Group, message: MessageChain, cmd: Me
     str_cont = len(cleaned_result)
     row_split = 120
     if not text:
-        await app.send_message(sender, MessageChain(draw_pic(result, width=1000)))
+        await app.send_message(sender, MessageChain(await draw_pic(result, width=1000, encoder="list")))
         return
     if str_cont > 4000 or row_cont > row_split:
         # 超长了，需要分段
@@ -595,15 +629,16 @@ async def _GetUpList(app: Ariadne, sender: Group, message: MessageChain, cmd: Me
             FullMatch(prefix),
             "cmd" @ UnionMatch(*list_describe),
             "text" @ ArgumentMatch("-t", "--text", action="store_true", default=False),
+            "page" @ ArgumentMatch("-p", "--page", type=int, default=0, optional=True),
         )],
     )
 )
 async def _GetUpListAll(app: Ariadne, sender: Friend, cmd: MessageChain = ResultValue(),
-                        text: bool = ResultValue()):
+                        text: bool = ResultValue(), page: int = ResultValue()):
     if check_not_mysql_datasource():
         return
     logger_prefix = get_logger_prefix(cmd.display, sender)
-    logger.info(f"{logger_prefix} {text = }")
+    logger.info(f"{logger_prefix} {text = } {page = }")
     obj_mysql = ObjMysql()
     if master_qq == "" or master_qq != sender.id:
         result = await obj_mysql.get_ups_by_target_with_pic_struct(sender.id, PushType.Friend)
@@ -623,7 +658,19 @@ async def _GetUpListAll(app: Ariadne, sender: Friend, cmd: MessageChain = Result
     row_split = 120
     logger.info(f"{logger_prefix} 成功 \n{cleaned_result}")
     if not text:
-        await app.send_message(sender, MessageChain(draw_pic(result, width=1000)))
+        # 按行数分页，每页绘制后立即发送，同一时间只持有一页图片
+        pages = split_list_pages(result, get_config("MYSQL_UP_LIST_PAGE_ROWS"))
+        if page > len(pages) or page < 0:
+            await app.send_message(sender, MessageChain(f"页码超出范围，共{len(pages)}页"))
+            return
+        if len(pages) == 1:
+            await app.send_message(sender, MessageChain(await draw_pic(result, width=1000, encoder="list")))
+            return
+        page_numbers = [page] if page > 0 else range(1, len(pages) + 1)
+        for i in page_numbers:
+            page_image = await draw_pic(pages[i - 1], title=f"订阅列表 第{i}/{len(pages)}页", width=1000,
+                                        encoder="list")
+            await app.send_message(sender, MessageChain(page_image))
         return
     if str_cont > 4000 or row_cont > row_split:
         # 超长了，需要分段
@@ -656,7 +703,7 @@ async def _ReloadUid(app: Ariadne, sender: Friend, cmd: MessageChain = ResultVal
     logger.info(f"{logger_prefix} {uid = }")
     if uid == "" or not uid.isdigit():
         logger.info(f"{logger_prefix} uid输入不合法({uid})")
-        await app.send_message(sender, MessageChain(draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
+        await app.send_message(sender, MessageChain(await draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
         return
     uid = int(uid)
     if master_qq == "" or master_qq != sender.id:
@@ -665,12 +712,12 @@ async def _ReloadUid(app: Ariadne, sender: Friend, cmd: MessageChain = ResultVal
     result = await obj_mysql.check_uid_exist_with_all(uid)
     if not result:
         logger.info(f"{logger_prefix} uid未被订阅({uid = })")
-        await app.send_message(sender, MessageChain(draw_pic("uid未被订阅，操作失败", width=800)))
+        await send_image(app, sender, await draw_pic("uid未被订阅，操作失败", width=800))
         return
     await obj_mysql.reload(uid)
     uname, _ = await select_uname_and_room_id(uid)
     logger.info(f"{logger_prefix} 成功 {uname}({uid})")
-    await app.send_message(sender, MessageChain(draw_pic(f"{uname}(UID:{uid}){cmd.display}成功", width=800)))
+    await app.send_message(sender, MessageChain(await draw_pic(f"{uname}(UID:{uid}){cmd.display}成功", width=800)))
 
 
 @channel.use(
@@ -694,7 +741,7 @@ async def _SetLogoGroup(app: Ariadne, sender: Group, member: Member, message: Me
     logger_prefix = get_logger_prefix(cmd.display, sender, member)
     if uid == "" or not uid.isdigit():
         logger.info(f"{logger_prefix} uid输入不合法({uid})")
-        await app.send_message(sender, MessageChain(draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
+        await app.send_message(sender, MessageChain(await draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
         return
     uid = int(uid)
     group = sender.id
@@ -705,13 +752,13 @@ async def _SetLogoGroup(app: Ariadne, sender: Group, member: Member, message: Me
         person = await app.get_member(group, member.id)
         if person.permission < MemberPerm.Administrator:
             logger.info(f"{logger_prefix} 权限不足({member.id = }, {person.permission = })")
-            await app.send_message(sender, MessageChain(draw_pic("权限不足，操作失败，仅群管理员和群主可操作", width=800)))
+            await send_image(app, sender, await draw_pic("权限不足，操作失败，仅群管理员和群主可操作", width=800))
             return
     obj_mysql = ObjMysql()
     result = await obj_mysql.check_uid_exist(uid, group)
     if not result:
         logger.info(f"{logger_prefix} uid未被订阅({uid = })")
-        await app.send_message(sender, MessageChain(draw_pic("uid未被订阅，操作失败", width=800)))
+        await send_image(app, sender, await draw_pic("uid未被订阅，操作失败", width=800))
         return
     time_out = 60
     await app.send_message(sender, MessageChain(f"请在{time_out}秒内发送立绘图片\n发送 取消 则操作取消，无事发生"))
@@ -744,14 +791,22 @@ async def _SetLogoGroup(app: Ariadne, sender: Group, member: Member, message: Me
             logger.info(f"{logger_prefix} 失败 原因：{result}")
             await app.send_message(sender, MessageChain(result))
             return
+        try:
+            logo_data = await element_get_bytes(image)
+            logo_data = await normalize_image_bytes(logo_data, "logo")
+        except ValueError as e:
+            result = f"操作失败，{e}"
+            logger.info(f"{logger_prefix} 失败 原因：{result}")
+            await app.send_message(sender, MessageChain(result))
+            return
         await obj_mysql.init_target(bot, uid, group)
-        logo_base64 = await element_get_bytes(image)
+        logo_base64 = base64.b64encode(logo_data).decode()
         obj_mysql.set_report_logo(logo_base64)
         await obj_mysql.save()
         uname, _ = obj_mysql.get_target_uname_and_roomid()
         logger.info(f"{logger_prefix} 成功 {uname}({uid})")
-        await app.send_message(sender, MessageChain(draw_pic(f"{uname}(UID:{uid}){cmd.display}成功", width=800)))
-        await app.send_message(sender, MessageChain(draw_image_pic(logo_base64, "直播报告立绘")))
+        await app.send_message(sender, MessageChain(await draw_pic(f"{uname}(UID:{uid}){cmd.display}成功", width=800)))
+        await app.send_message(sender, MessageChain(await draw_image_pic(logo_base64, "直播报告立绘")))
 
 
 @channel.use(
@@ -774,7 +829,7 @@ async def _SetLogoFriend(app: Ariadne, sender: Friend, cmd: MessageChain = Resul
     logger_prefix = get_logger_prefix(cmd.display, sender)
     if uid == "" or not uid.isdigit():
         logger.info(f"{logger_prefix} uid输入不合法({uid})")
-        await app.send_message(sender, MessageChain(draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
+        await app.send_message(sender, MessageChain(await draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
         return
     uid = int(uid)
     bot = app.account
@@ -796,7 +851,7 @@ async def _SetLogoFriend(app: Ariadne, sender: Friend, cmd: MessageChain = Resul
     result = await obj_mysql.check_uid_exist(uid, source, source_type)
     if not result:
         logger.info(f"{logger_prefix} uid未被订阅({uid = })")
-        await app.send_message(sender, MessageChain(draw_pic("uid未被订阅，操作失败", width=800)))
+        await send_image(app, sender, await draw_pic("uid未被订阅，操作失败", width=800))
         return
     time_out = 60
     await app.send_message(sender, MessageChain(f"请在{time_out}秒内发送立绘图片\n发送 取消 则操作取消，无事发生"))
@@ -829,14 +884,22 @@ async def _SetLogoFriend(app: Ariadne, sender: Friend, cmd: MessageChain = Resul
             logger.info(f"{logger_prefix}失败 原因：{result}")
             await app.send_message(sender, MessageChain(result))
             return
+        try:
+            logo_data = await element_get_bytes(image)
+            logo_data = await normalize_image_bytes(logo_data, "logo")
+        except ValueError as e:
+            result = f"操作失败，{e}"
+            logger.info(f"{logger_prefix} 失败 原因：{result}")
+            await app.send_message(sender, MessageChain(result))
+            return
         await obj_mysql.init_target(bot, uid, source, source_type)
-        logo_base64 = await element_get_bytes(image)
+        logo_base64 = base64.b64encode(logo_data).decode()
         obj_mysql.set_report_logo(logo_base64)
         await obj_mysql.save()
         uname, _ = obj_mysql.get_target_uname_and_roomid()
         logger.info(f"{logger_prefix} 成功 {msg_prefix}[{uname}]({uid})")
-        await app.send_message(sender, MessageChain(draw_pic(f"{msg_prefix}{uname}(UID:{uid}){cmd.display}成功")))
-        await app.send_message(sender, MessageChain(draw_image_pic(logo_base64, "直播报告立绘")))
+        await app.send_message(sender, MessageChain(await draw_pic(f"{msg_prefix}{uname}(UID:{uid}){cmd.display}成功")))
+        await app.send_message(sender, MessageChain(await draw_image_pic(logo_base64, "直播报告立绘")))
 
 
 @channel.use(
@@ -860,7 +923,7 @@ async def _ClearLogoGroup(app: Ariadne, sender: Group, member: Member, message:
     logger_prefix = get_logger_prefix(cmd.display, sender, member)
     if uid == "" or not uid.isdigit():
         logger.info(f"{logger_prefix} uid输入不合法({uid})")
-        await app.send_message(sender, MessageChain(draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
+        await app.send_message(sender, MessageChain(await draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
         return
     uid = int(uid)
     group = sender.id
@@ -871,20 +934,20 @@ async def _ClearLogoGroup(app: Ariadne, sender: Group, member: Member, message:
         person = await app.get_member(group, member.id)
         if person.permission < MemberPerm.Administrator:
             logger.info(f"{logger_prefix} 权限不足({member.id = }, {person.permission = })")
-            await app.send_message(sender, MessageChain(draw_pic("权限不足，操作失败，仅群管理员和群主可操作", width=800)))
+            await send_image(app, sender, await draw_pic("权限不足，操作失败，仅群管理员和群主可操作", width=800))
             return
     obj_mysql = ObjMysql()
     result = await obj_mysql.check_uid_exist(uid, group)
     if not result:
         logger.info(f"{logger_prefix} uid未被订阅({uid = })")
-        await app.send_message(sender, MessageChain(draw_pic("uid未被订阅，操作失败", width=800)))
+        await send_image(app, sender, await draw_pic("uid未被订阅，操作失败", width=800))
         return
     await obj_mysql.init_target(bot, uid, group)
     obj_mysql.clear_report_logo()
     await obj_mysql.save()
     uname, _ = obj_mysql.get_target_uname_and_roomid()
     logger.info(f"{logger_prefix} 成功{uname}({uid})")
-    await app.send_message(sender, MessageChain(draw_pic(f"{uname}(UID:{uid}){cmd.display}成功", width=800)))
+    await app.send_message(sender, MessageChain(await draw_pic(f"{uname}(UID:{uid}){cmd.display}成功", width=800)))
 
 
 @channel.use(
@@ -907,7 +970,7 @@ async def _ClearLogoFriend(app: Ariadne, sender: Friend, cmd: MessageChain = Res
     logger_prefix = get_logger_prefix(cmd.display, sender)
     if uid == "" or not uid.isdigit():
         logger.info(f"{logger_prefix} uid输入不合法({uid})")
-        await app.send_message(sender, MessageChain(draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
+        await app.send_message(sender, MessageChain(await draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
         return
     uid = int(uid)
     bot = app.account
@@ -927,14 +990,14 @@ async def _ClearLogoFriend(app: Ariadne, sender: Friend, cmd: MessageChain = Res
     result = await obj_mysql.check_uid_exist(uid, source, source_type)
     if not result:
         logger.info(f"{logger_prefix} uid未被订阅({uid = })")
-        await app.send_message(sender, MessageChain(draw_pic("uid未被订阅，操作失败", width=800)))
+        await send_image(app, sender, await draw_pic("uid未被订阅，操作失败", width=800))
         return
     await obj_mysql.init_target(bot, uid, source, source_type)
     obj_mysql.clear_report_logo()
     await obj_mysql.save()
     uname, _ = obj_mysql.get_target_uname_and_roomid()
     logger.info(f"{logger_prefix} 成功 {msg_prefix}[{uname}]({uid})")
-    await app.send_message(sender, MessageChain(draw_pic(f"{msg_prefix}{uname}(UID:{uid}){cmd.display}成功")))
+    await app.send_message(sender, MessageChain(await draw_pic(f"{msg_prefix}{uname}(UID:{uid}){cmd.display}成功")))
 
 
 @channel.use(
@@ -960,7 +1023,7 @@ async def _SetMessageGroup(app: Ariadne, sender: Group, member: Member, message:
     logger_prefix = get_logger_prefix(cmd.display, sender, member)
     if uid == "" or not uid.isdigit():
         logger.info(f"{logger_prefix} uid输入不合法({uid})")
-        await app.send_message(sender, MessageChain(draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
+        await app.send_message(sender, MessageChain(await draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
         return
     uid = int(uid)
     group = sender.id
@@ -971,13 +1034,13 @@ async def _SetMessageGroup(app: Ariadne, sender: Group, member: Member, message:
         person = await app.get_member(group, member.id)
         if person.permission < MemberPerm.Administrator:
             logger.info(f"{logger_prefix} 权限不足({member.id = }, {person.permission = })")
-            await app.send_message(sender, MessageChain(draw_pic("权限不足，操作失败，仅群管理员和群主可操作", width=800)))
+            await send_image(app, sender, await draw_pic("权限不足，操作失败，仅群管理员和群主可操作", width=800))
             return
     obj_mysql = ObjMysql()
     result = await obj_mysql.check_uid_exist(uid, group)
     if not result:
         logger.info(f"{logger_prefix} uid未被订阅({uid = })")
-        await app.send_message(sender, MessageChain(draw_pic("uid未被订阅，操作失败", width=800)))
+        await send_image(app, sender, await draw_pic("uid未被订阅，操作失败", width=800))
         return
     timeout_s = 600
     await app.send_message(sender, MessageChain(get_message_help(
@@ -1001,21 +1064,29 @@ async def _SetMessageGroup(app: Ariadne, sender: Group, member: Member, message:
             await app.send_message(sender, MessageChain(result))
             return
         msg = ""
-        for element in ret_msg.content:
-            if isinstance(element, Image):
-                msg += "{base64pic=" + await element_get_bytes(element) + "}"
-            if isinstance(element, At):
-                msg += "{at" + f"{element.target}" + "}"
-            if isinstance(element, AtAll):
-                msg += "{atall}"
-            if isinstance(element, Plain):
-                msg += element.text
+        try:
+            for element in ret_msg.content:
+                if isinstance(element, Image):
+                    image_data = await element_get_bytes(element)
+                    image_data = await normalize_image_bytes(image_data)
+                    msg += "{base64pic=" + base64.b64encode(image_data).decode() + "}"
+                if isinstance(element, At):
+                    msg += "{at" + f"{element.target}" + "}"
+                if isinstance(element, AtAll):
+                    msg += "{atall}"
+                if isinstance(element, Plain):
+                    msg += element.text
+        except ValueError as e:
+            result = f"操作失败，{e}"
+            logger.info(f"{logger_prefix} 失败 原因：{result}")
+            await app.send_message(sender, MessageChain(result))
+            return
         await obj_mysql.init_target(bot, uid, group)
         obj_mysql.set_message_inner(message_type, msg)
         await obj_mysql.save()
         uname, _ = obj_mysql.get_target_uname_and_roomid()
         logger.info(f"{logger_prefix} 成功 {uname}({uid})")
-        await app.send_message(sender, MessageChain(draw_pic(f"{uname}(UID:{uid}){cmd.display}成功", width=800)))
+        await app.send_message(sender, MessageChain(await draw_pic(f"{uname}(UID:{uid}){cmd.display}成功", width=800)))
 
 
 @channel.use(
@@ -1040,7 +1111,7 @@ async def _SetMessageFriend(app: Ariadne, sender: Friend, cmd: MessageChain = Re
     logger_prefix = get_logger_prefix(cmd.display, sender)
     if uid == "" or not uid.isdigit():
         logger.info(f"{logger_prefix} uid输入不合法({uid})")
-        await app.send_message(sender, MessageChain(draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
+        await app.send_message(sender, MessageChain(await draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
         return
     uid = int(uid)
     bot = app.account
@@ -1062,7 +1133,7 @@ async def _SetMessageFriend(app: Ariadne, sender: Friend, cmd: MessageChain = Re
     result = await obj_mysql.check_uid_exist(uid, source, source_type)
     if not result:
         logger.info(f"{logger_prefix} uid未被订阅({uid = })")
-        await app.send_message(sender, MessageChain(draw_pic("uid未被订阅，操作失败", width=800)))
+        await send_image(app, sender, await draw_pic("uid未被订阅，操作失败", width=800))
         return
     timeout_s = 600
     await app.send_message(sender, MessageChain(get_message_help(
@@ -1086,17 +1157,25 @@ async def _SetMessageFriend(app: Ariadne, sender: Friend, cmd: MessageChain = Re
             await app.send_message(sender, MessageChain(result))
             return
         msg = ""
-        for element in ret_msg.content:
-            if isinstance(element, Image):
-                msg += "{base64pic=" + await element_get_bytes(element) + "}"
-            if isinstance(element, Plain):
-                msg += element.text
+        try:
+            for element in ret_msg.content:
+                if isinstance(element, Image):
+                    image_data = await element_get_bytes(element)
+                    image_data = await normalize_image_bytes(image_data)
+                    msg += "{base64pic=" + base64.b64encode(image_data).decode() + "}"
+                if isinstance(element, Plain):
+                    msg += element.text
+        except ValueError as e:
+            result = f"操作失败，{e}"
+            logger.info(f"{logger_prefix} 失败 原因：{result}")
+            await app.send_message(sender, MessageChain(result))
+            return
         await obj_mysql.init_target(bot, uid, source, source_type)
         obj_mysql.set_message_inner(message_type, msg)
         await obj_mysql.save()
         uname, _ = obj_mysql.get_target_uname_and_roomid()
         logger.info(f"{logger_prefix} 成功 {msg_prefix}[{uname}]({uid})")
-        await app.send_message(sender, MessageChain(draw_pic(f"{msg_prefix}{uname}(UID:{uid}){cmd.display}成功")))
+        await app.send_message(sender, MessageChain(await draw_pic(f"{msg_prefix}{uname}(UID:{uid}){cmd.display}成功")))
 
 
 @channel.use(
@@ -1129,7 +1208,8 @@ async def _SetReportHelpGroup(app: Ariadne, sender: Group, message: MessageChain
             " "
         ]
         help_str = append_report_help(help_str)
-        await app.send_message(sender, MessageChain(draw_pic(help_str, title=f"{cmd.display} 帮助", width=700)))
+        image = await draw_help_pic(("set_report_group", cmd.display), help_str, title=f"{cmd.display} 帮助", width=700)
+        await send_image(app, sender, image)
         raise PropagationCancelled
 
 
@@ -1164,7 +1244,9 @@ async def _SetReportHelpFriend(app: Ariadne, sender: Friend, cmd: MessageChain =
             help_str.append(f"示例：{prefix}{cmd.display} -g 123456789 2 sc榜 3")
         help_str.append(" ")
         help_str = append_report_help(help_str)
-        await app.send_message(sender, MessageChain(draw_pic(help_str, title=f"{cmd.display} 帮助", width=700)))
+        image = await draw_help_pic(("set_report_friend", master_qq == sender.id, cmd.display), help_str,
+                                    title=f"{cmd.display} 帮助", width=700)
+        await send_image(app, sender, image)
         raise PropagationCancelled
 
 
@@ -1192,7 +1274,7 @@ async def _SetReportGroup(app: Ariadne, sender: Group, member: Member, message:
     logger_prefix = get_logger_prefix(cmd.display, sender, member)
     if uid == "" or not uid.isdigit():
         logger.info(f"{logger_prefix} uid输入不合法({uid})")
-        await app.send_message(sender, MessageChain(draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
+        await app.send_message(sender, MessageChain(await draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
         return
     uid = int(uid)
     group = sender.id
@@ -1205,13 +1287,13 @@ async def _SetReportGroup(app: Ariadne, sender: Group, member: Member, message:
         person = await app.get_member(group, member.id)
         if person.permission < MemberPerm.Administrator:
             logger.info(f"{logger_prefix} 权限不足({member.id = }, {person.permission = })")
-            await app.send_message(sender, MessageChain(draw_pic("权限不足，操作失败，仅群管理员和群主可操作", width=800)))
+            await send_image(app, sender, await draw_pic("权限不足，操作失败，仅群管理员和群主可操作", width=800))
             return
     obj_mysql = ObjMysql()
     result = await obj_mysql.check_uid_exist(uid, group)
     if not result:
         logger.info(f"{logger_prefix} uid未被订阅({uid = })")
-        await app.send_message(sender, MessageChain(draw_pic("uid未被订阅，操作失败", width=800)))
+        await send_image(app, sender, await draw_pic("uid未被订阅，操作失败", width=800))
         return
     await obj_mysql.init_target(bot, uid, group)
     res = obj_mysql.config_report(configuration, value)
@@ -1219,11 +1301,11 @@ async def _SetReportGroup(app: Ariadne, sender: Group, member: Member, message:
     if not res:
         logger.info(f"{logger_prefix} 失败[{uname}]({uid})")
         await app.send_message(sender, MessageChain(
-            draw_pic(f"{uname}({uid}){cmd.display}失败，请检查参数是否正确", width=1000)))
+            await draw_pic(f"{uname}({uid}){cmd.display}失败，请检查参数是否正确", width=1000)))
         return
     await obj_mysql.save()
     logger.info(f"{logger_prefix} 成功[{uname}]({uid})")
-    await app.send_message(sender, MessageChain(draw_pic(f"{uname}(UID:{uid}){cmd.display}成功")))
+    await app.send_message(sender, MessageChain(await draw_pic(f"{uname}(UID:{uid}){cmd.display}成功")))
 
 
 @channel.use(
@@ -1249,7 +1331,7 @@ async def _SetReportFriend(app: Ariadne, sender: Friend, cmd: MessageChain = Res
     logger_prefix = get_logger_prefix(cmd.display, sender)
     if uid == "" or not uid.isdigit():
         logger.info(f"{logger_prefix} uid输入不合法({uid})")
-        await app.send_message(sender, MessageChain(draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
+        await app.send_message(sender, MessageChain(await draw_pic(f"uid输入不合法({uid})，操作失败", width=800)))
         return
     uid = int(uid)
     configuration = configuration.display
@@ -1273,7 +1355,7 @@ async def _SetReportFriend(app: Ariadne, sender: Friend, cmd: MessageChain = Res
     result = await obj_mysql.check_uid_exist(uid, source, source_type)
     if not result:
         logger.info(f"{logger_prefix} uid未被订阅({uid = })")
-        await app.send_message(sender, MessageChain(draw_pic("uid未被订阅，操作失败", width=800)))
+        await send_image(app, sender, await draw_pic("uid未被订阅，操作失败", width=800))
         return
     await obj_mysql.init_target(bot, uid, source, source_type)
     res = obj_mysql.config_report(configuration, value)
@@ -1281,11 +1363,11 @@ async def _SetReportFriend(app: Ariadne, sender: Friend, cmd: MessageChain = Res
     if not res:
         logger.info(f"{logger_prefix} 失败[{uname}]({uid})")
         await app.send_message(sender, MessageChain(
-            draw_pic(f"{msg_prefix}{uname}({uid}){cmd.display}失败，请检查参数是否正确")))
+            await draw_pic(f"{msg_prefix}{uname}({uid}){cmd.display}失败，请检查参数是否正确")))
         return
     await obj_mysql.save()
     logger.info(f"{logger_prefix} 成功 {msg_prefix}[{uname}]({uid})")
-    await app.send_message(sender, MessageChain(draw_pic(f"{msg_prefix}{uname}(UID:{uid}){cmd.display}成功")))
+    await app.send_message(sender, MessageChain(await draw_pic(f"{msg_prefix}{uname}(UID:{uid}){cmd.display}成功")))
 
 
 @channel.use(
@@ -1313,9 +1395,9 @@ async def _QuitGroup(app: Ariadne, sender: Group, member: Member, message: Messa
         person = await app.get_member(group, member.id)
         if person.permission < MemberPerm.Administrator:
             logger.info(f"{logger_prefix} 权限不足({member.id = }, {person.permission = })")
-            await app.send_message(sender, MessageChain(draw_pic("权限不足，操作失败，仅群管理员和群主可操作", width=800)))
+            await send_image(app, sender, await draw_pic("权限不足，操作失败，仅群管理员和群主可操作", width=800))
             return
-    await app.send_message(sender, MessageChain(draw_pic(f"{cmd.display}成功", width=800)))
+    await send_image(app, sender, await draw_pic(f"{cmd.display}成功", width=800))
     await app.quit_group(sender)
     obj_mysql = ObjMysql()
     await obj_mysql.clean_describe(bot, sender.id, PushType.Group)
@@ -1344,7 +1426,7 @@ async def _QuitGroupPrivate(app: Ariadne, sender: Friend, group_num: MessageChai
     logger_prefix = get_logger_prefix(cmd.display, sender)
     if group_num == "" or not group_num.isdigit():
         logger.info(f"{logger_prefix} group_num输入不合法({group_num})")
-        await app.send_message(sender, MessageChain(draw_pic(f"group_num输入不合法({group_num})，操作失败", width=800)))
+        await app.send_message(sender, MessageChain(await draw_pic(f"group_num输入不合法({group_num})，操作失败", width=800)))
         return
     group_num = int(group_num)
     logger.info(f"{logger_prefix} ({group_num = })")
@@ -1357,7 +1439,7 @@ async def _QuitGroupPrivate(app: Ariadne, sender: Friend, group_num: MessageChai
     obj_mysql = ObjMysql()
     await obj_mysql.clean_describe(bot, group_num, PushType.Group)
     logger.info(f"{logger_prefix} 成功")
-    await app.send_message(sender, MessageChain(draw_pic(f"{cmd.display}成功", width=800)))
+    await send_image(app, sender, await draw_pic(f"{cmd.display}成功", width=800))
 
 
 @channel.use(
@@ -1381,7 +1463,7 @@ async def _DelFrindPrivate(app: Ariadne, sender: Friend, qq_num: MessageChain =
     logger_prefix = get_logger_prefix(cmd.display, sender)
     if qq_num == "" or not qq_num.isdigit():
         logger.info(f"{logger_prefix} qq_num输入不合法({qq_num})")
-        await app.send_message(sender, MessageChain(draw_pic(f"qq_num输入不合法({qq_num})，操作失败", width=800)))
+        await app.send_message(sender, MessageChain(await draw_pic(f"qq_num输入不合法({qq_num})，操作失败", width=800)))
         return
     qq_num = int(qq_num)
     logger.info(f"{logger_prefix} ({qq_num = })")
@@ -1394,7 +1476,7 @@ async def _DelFrindPrivate(app: Ariadne, sender: Friend, qq_num: MessageChain =
     obj_mysql = ObjMysql()
     await obj_mysql.clean_describe(bot, qq_num, PushType.Friend)
     logger.info(f"{logger_prefix} 成功")
-    await app.send_message(sender, MessageChain(draw_pic(f"{cmd.display}成功", width=800)))
+    await send_image(app, sender, await draw_pic(f"{cmd.display}成功", width=800))
 
 
 @channel.use(
@@ -1426,7 +1508,7 @@ async def _CheckDescribeAbnormal(app: Ariadne, sender: Friend, cmd: MessageChain
     if len(group_abnormal_describe) < 1 or len(friend_abnormal_describe) < 1:
         result = "无异常订阅"
         logger.info(f"{logger_prefix} 成功 \n{result}")
-        image = draw_pic(result)
+        image = await draw_pic(result)
         await app.send_message(sender, MessageChain(image))
         return
     abnormal_list = []
@@ -1438,7 +1520,7 @@ async def _CheckDescribeAbnormal(app: Ariadne, sender: Friend, cmd: MessageChain
         abnormal_list.append(friend_abnormal)
     result = f"异常订阅群号: {group_abnormal_describe}\n异常订阅好友: {friend_abnormal_describe}"
     logger.info(f"{logger_prefix} 成功 \n{result}")
-    image = draw_pic(abnormal_list)
+    image = await draw_pic(abnormal_list)
     await app.send_message(sender, MessageChain(image))
 
 
@@ -1471,7 +1553,7 @@ async def _ClearDescribeAbnormal(app: Ariadne, sender: Friend, cmd: MessageChain
     if len(group_abnormal_describe) < 1 or len(friend_abnormal_describe) < 1:
         result = "无异常订阅"
         logger.info(f"{logger_prefix} 成功 \n{result}")
-        image = draw_pic(result)
+        image = await draw_pic(result)
         await app.send_message(sender, MessageChain(image))
         return
     abnormal_list = []
@@ -1482,15 +1564,13 @@ async def _ClearDescribeAbnormal(app: Ariadne, sender: Friend, cmd: MessageChain
         friend_abnormal = {"section": "清除异常订阅好友", "context": list(friend_abnormal_describe)}
         abnormal_list.append(friend_abnormal)
     bot = app.account
-    up_list = obj_mysql.get_ups_by_targets(friend_abnormal_describe, group_abnormal_describe)
-    for up in up_list:
-        obj_mysql = ObjMysql()
-        await obj_mysql.init_target(bot, up[0], up[1])
-        await obj_mysql.delete()
+    abnormal_targets = {(g, PushType.Group) for g in group_abnormal_describe}
+    abnormal_targets.update({(f, PushType.Friend) for f in friend_abnormal_describe})
+    await obj_mysql.delete_targets(bot, abnormal_targets)
     result = f"清除异常订阅群号: {group_abnormal_describe}\n清除异常订阅好友: {friend_abnormal_describe}"
     logger.info(f"{logger_prefix} 成功 \n{result}")
     abnormal_list.append("清除异常订阅成功")
-    image = draw_pic(abnormal_list)
+    image = await draw_pic(abnormal_list)
     await app.send_message(sender, MessageChain(image))
 
 
@@ -1515,7 +1595,7 @@ async def _MysqlHelp(app: Ariadne, sender: Union[Friend, Group], message: Messag
     logger.info(f"{logger_prefix} {default = }")
     if check_not_mysql_datasource() or default:
         # 若需要使用原始帮助触发，该分支直接return即可
-        await app.send_message(sender, MessageChain(await default_help(sender)))
+        await send_image(app, sender, await default_help(sender))
         # 拦截默认解析
         raise PropagationCancelled
 
@@ -1538,8 +1618,8 @@ async def _MysqlHelp(app: Ariadne, sender: Union[Friend, Group], message: Messag
                 "context": value.get(context_type)
             }
             pic_context.append(cmd_inner)
-    image = draw_pic(pic_context, cmd.display, help_cmd_sub_title, width=1700)
-    await app.send_message(sender, MessageChain(image))
+    image = await draw_help_pic((context_type, cmd.display), pic_context, cmd.display, help_cmd_sub_title, width=1700)
+    await send_image(app, sender, image)
     # 拦截默认解析
     raise PropagationCancelled
 
@@ -1583,6 +1663,29 @@ async def _GetStatusGroup(app: Ariadne, sender: Group, member: Member, message:
     logger.info(f"{logger_prefix} {status_result}")
 
 
+@channel.use(
+    ListenerSchema(
+        listening_events=[FriendMessage],
+        inline_dispatchers=[Twilight(
+            ElementMatch(At, optional=True),
+            FullMatch(prefix),
+            "cmd" @ UnionMatch(*blob_gc)
+        )],
+    )
+)
+async def _BlobGc(app: Ariadne, sender: Friend, cmd: MessageChain = ResultValue()):
+    if check_not_mysql_datasource():
+        return
+    if master_qq == "" or master_qq != sender.id:
+        # 功能需要配置MASTER_QQ
+        return
+    logger_prefix = get_logger_prefix(cmd.display, sender)
+    logger.info(f"{logger_prefix}")
+    deleted = await blob_store.gc(Ariadne.options["StarBotDataSource"])
+    logger.info(f"{logger_prefix} 已删除 {deleted} 张图片")
+    await app.send_message(sender, MessageChain(await draw_pic(f"已删除 {deleted} 张未被引用的图片", width=800)))
+
+
 @channel.use(
     ListenerSchema(
         listening_events=[FriendMessage],
@@ -1598,6 +1701,9 @@ async def _GetStatusPrivate(app: Ariadne, sender: Friend, cmd: MessageChain = Re
     logger_prefix = get_logger_prefix(cmd.display, sender)
     logger.info(f"{logger_prefix}")
     status_result = "Running on StarBot v" + StarBot.VERSION
+    status_result += f"\n图片缓存: {pic_cache.stats()}"
+    status_result += f"\n图片编码: {encode_stats.stats()}"
+    status_result += f"\n图片下载: {media_client.stats()}"
     await app.send_message(sender, MessageChain(status_result))
     logger.info(f"{logger_prefix} {status_result}")
 
@@ -1615,14 +1721,14 @@ async def _GetBotMode(app: Ariadne, sender: Friend, cmd: MessageChain = ResultVa
     logger_prefix = get_logger_prefix(cmd.display, sender)
     logger.info(f"{logger_prefix}")
     if master_qq == "" or master_qq != sender.id:
-        await app.send_message(sender, MessageChain(draw_pic(f"权限不够", width=800)))
+        await send_image(app, sender, await draw_pic(f"权限不够", width=800))
         return
     qq = app.account
     if await check_bot_mode_public(qq):
-        await app.send_message(sender, MessageChain(draw_pic(f"公开模式", width=800)))
+        await send_image(app, sender, await draw_pic(f"公开模式", width=800))
         return
     else:
-        await app.send_message(sender, MessageChain(draw_pic(f"私人模式", width=800)))
+        await send_image(app, sender, await draw_pic(f"私人模式", width=800))
         return
 
 
@@ -1642,16 +1748,16 @@ async def _SetBotMode(app: Ariadne, sender: Friend,
     logger_prefix = get_logger_prefix(cmd.display, sender)
     logger.info(f"{logger_prefix} {value = }")
     if master_qq == "" or master_qq != sender.id:
-        await app.send_message(sender, MessageChain(draw_pic(f"权限不够", width=800)))
+        await send_image(app, sender, await draw_pic(f"权限不够", width=800))
         return
     qq = app.account
     if value == "公开":
         await set_bot_mode_public(qq)
-        await app.send_message(sender, MessageChain(draw_pic(f"已设置为公开模式，将自动通过好友申请和群聊邀请")))
+        await send_image(app, sender, await draw_pic(f"已设置为公开模式，将自动通过好友申请和群聊邀请"))
         return
     elif value == "私人":
         await set_bot_mode_private(qq)
-        await app.send_message(sender, MessageChain(draw_pic(f"已设置为私人模式，自动拒绝除主人外好友申请和群聊邀请")))
+        await send_image(app, sender, await draw_pic(f"已设置为私人模式，自动拒绝除主人外好友申请和群聊邀请"))
         return
     else:
         await app.send_message(sender, MessageChain("输入有误，有效输入为 公开 或 私人"))